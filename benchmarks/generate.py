@@ -0,0 +1,251 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+# Columns of Synthea's patients.csv and encounters.csv exports.
+PATIENT_COLUMNS = ['Id', 'BIRTHDATE', 'DEATHDATE', 'SSN', 'DRIVERS', 'PASSPORT', 'PREFIX', 'FIRST', 'LAST', 'SUFFIX',
+                   'MAIDEN', 'MARITAL', 'RACE', 'ETHNICITY', 'GENDER', 'BIRTHPLACE', 'ADDRESS', 'CITY', 'STATE',
+                   'COUNTY', 'ZIP', 'LAT', 'LON', 'HEALTHCARE_EXPENSES', 'HEALTHCARE_COVERAGE']
+ENCOUNTER_COLUMNS = ['Id', 'START', 'STOP', 'PATIENT', 'ORGANIZATION', 'PROVIDER', 'PAYER', 'ENCOUNTERCLASS', 'CODE',
+                     'DESCRIPTION', 'BASE_ENCOUNTER_COST', 'TOTAL_CLAIM_COST', 'PAYER_COVERAGE', 'REASONCODE',
+                     'REASONDESCRIPTION']
+
+# Demographic mix of the shipped Massachusetts patients.csv.
+RACES = {'white': 0.8361, 'black': 0.0891, 'asian': 0.0682, 'native': 0.0059, 'other': 0.0007}
+ETHNICITIES = {'nonhispanic': 0.8935, 'hispanic': 0.1065}
+GENDERS = {'F': 0.5062, 'M': 0.4938}
+COUNTIES = {
+    'Middlesex County': (0.2277, 'Cambridge', '02139', 42.37, -71.11),
+    'Worcester County': (0.1286, 'Worcester', '01608', 42.26, -71.80),
+    'Suffolk County': (0.1102, 'Boston', '02108', 42.36, -71.06),
+    'Essex County': (0.1085, 'Lynn', '01901', 42.47, -70.95),
+    'Norfolk County': (0.1082, 'Quincy', '02169', 42.25, -71.00),
+    'Bristol County': (0.0814, 'New Bedford', '02740', 41.64, -70.93),
+    'Plymouth County': (0.0708, 'Brockton', '02301', 42.08, -71.02),
+    'Hampden County': (0.0674, 'Springfield', '01106', 42.10, -72.59),
+    'Barnstable County': (0.0369, 'Barnstable', '02630', 41.70, -70.30),
+    'Hampshire County': (0.0222, 'Northampton', '01060', 42.33, -72.64),
+    'Berkshire County': (0.0219, 'Pittsfield', '01201', 42.45, -73.25),
+    'Franklin County': (0.0096, 'Greenfield', '01301', 42.59, -72.60),
+    'Dukes County': (0.0042, 'Edgartown', '02539', 41.39, -70.51),
+    'Nantucket County': (0.0025, 'Nantucket', '02554', 41.28, -70.10),
+}
+ENCOUNTER_CLASSES = {'ambulatory': 0.43, 'wellness': 0.21, 'outpatient': 0.19, 'urgentcare': 0.07,
+                     'emergency': 0.06, 'inpatient': 0.04}
+# Built-in disparities: relative odds of an inpatient or emergency encounter.
+TREATMENT_SKEW = {'RACE': {'black': 1.35, 'native': 1.25}, 'ETHNICITY': {'hispanic': 1.2}, 'GENDER': {'M': 1.1}}
+OVER_65_SKEW = 1.8
+FIRST_NAMES = ['Jacinto', 'Jayson', 'Maria', 'Ana', 'Wei', 'Aaliyah', 'Liam', 'Olivia', 'Noah', 'Sofia', 'Amir', 'Chloe']
+LAST_NAMES = ['Kris', 'Fadel', 'Smith', 'Garcia', 'Nguyen', 'Johnson', 'Okafor', 'Chen', 'Silva', 'Murphy']
+STREETS = ['Hickle Ferry', 'Harris Lane', 'Main Street', 'Oak Avenue', 'Elm Court', 'River Road']
+
+CHUNK_ROWS = 1000000  # Fixed so the output doesn't depend on how it was chunked.
+START_DATE, END_DATE = np.datetime64('2010-01-01T00:00:00'), np.datetime64('2025-01-01T00:00:00')
+HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def _rng(seed, stream, chunk):
+    return np.random.default_rng([seed, stream, chunk])
+
+
+def _splitmix64(x):
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def uuids(index, seed, stream):
+    """Deterministic UUID4-formatted ids for row indices, computed without storing them."""
+    index = np.asarray(index, dtype=np.uint64)
+    salt = np.uint64((seed * 1000003 + stream) & 0xFFFFFFFF) << np.uint64(32)
+    halves = np.stack([_splitmix64(index ^ salt), _splitmix64(~index ^ salt)], axis=1)
+    raw = halves.astype('>u8').view(np.uint8).reshape(len(index), 16)
+    nibbles = np.empty((len(index), 32), dtype=np.uint8)
+    nibbles[:, 0::2], nibbles[:, 1::2] = raw >> 4, raw & 15
+    nibbles[:, 12] = 4
+    out = np.full((len(index), 36), ord('-'), dtype=np.uint8)
+    out[:, [i for i in range(36) if i not in (8, 13, 18, 23)]] = HEX[nibbles]
+    return out.view('S36').ravel()
+
+
+def _choice(rng, options, n):
+    keys = list(options)
+    p = np.array([options[k] if np.isscalar(options[k]) else options[k][0] for k in keys])
+    return rng.choice(len(keys), size=n, p=p / p.sum())
+
+
+def _numbered(rng, names, n):
+    return pd.Series(np.array(names)[rng.integers(len(names), size=n)]) + rng.integers(100, 999, size=n).astype(str)
+
+
+def _timestamps(values):
+    return pd.Series(np.datetime_as_string(values, unit='s')) + 'Z'
+
+
+def _table(columns, names, n):
+    """Arrow table in `names` order; scalars are broadcast and empty strings become empty CSV fields."""
+    arrays = []
+    for name in names:
+        values = columns[name]
+        if isinstance(values, str):
+            array = pa.array(np.full(n, values)) if values else pa.nulls(n, pa.string())
+        else:
+            values = np.asarray(values)
+            array = pa.array(values).cast(pa.string()) if values.dtype.kind == 'S' else pa.array(values)
+        if pa.types.is_string(array.type) and array.null_count < n:
+            array = pc.if_else(pc.equal(array, ''), pa.scalar(None, pa.string()), array)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def patient_chunk(seed, chunk, start, n):
+    """Patients start..start+n, plus the per-patient inputs the encounter generator needs."""
+    rng = _rng(seed, 0, chunk)
+    demographics = {
+        'RACE': np.array(list(RACES))[_choice(rng, RACES, n)],
+        'ETHNICITY': np.array(list(ETHNICITIES))[_choice(rng, ETHNICITIES, n)],
+        'GENDER': np.array(list(GENDERS))[_choice(rng, GENDERS, n)],
+    }
+    county = _choice(rng, COUNTIES, n)
+    birth_year = np.clip(rng.normal(1972, 28, n).round(), 1909, 2024).astype(np.int64)
+    birthdate = (birth_year - 1970).astype('datetime64[Y]').astype('datetime64[D]') + rng.integers(365, size=n)
+    dead = rng.random(n) < 0.19
+    deathdate = np.where(dead, np.datetime_as_string(birthdate + rng.integers(365, 365 * 95, size=n)), '')
+    info = np.array(list(COUNTIES.values()), dtype=object)[county]
+    frame = _table({
+        'Id': uuids(np.arange(start, start + n), seed, 0),
+        'BIRTHDATE': np.datetime_as_string(birthdate),
+        'DEATHDATE': np.where(deathdate > np.datetime_as_string(END_DATE.astype('datetime64[D]')), '', deathdate),
+        'SSN': [f"999-{a:02d}-{b:04d}" for a, b in zip(rng.integers(100, size=n), rng.integers(10000, size=n))],
+        'DRIVERS': np.where(rng.random(n) < 0.84, 'S999' + rng.integers(10**5, 10**6, size=n).astype(str), ''),
+        'PASSPORT': np.where(rng.random(n) < 0.8, 'X' + rng.integers(10**7, 10**8, size=n).astype(str) + 'X', ''),
+        'PREFIX': np.where(demographics['GENDER'] == 'M', 'Mr.', np.where(rng.random(n) < 0.6, 'Mrs.', 'Ms.')),
+        'FIRST': _numbered(rng, FIRST_NAMES, n),
+        'LAST': _numbered(rng, LAST_NAMES, n),
+        'SUFFIX': np.where(rng.random(n) < 0.01, 'MD', ''),
+        'MAIDEN': '',
+        'MARITAL': np.array(['M', 'S', ''])[rng.choice(3, size=n, p=[0.57, 0.14, 0.29])],
+        'RACE': demographics['RACE'],
+        'ETHNICITY': demographics['ETHNICITY'],
+        'GENDER': demographics['GENDER'],
+        'BIRTHPLACE': pd.Series([c[1] for c in info]) + '  Massachusetts  US',
+        'ADDRESS': (pd.Series(rng.integers(1, 2000, size=n)).astype(str) + ' '
+                    + np.array(STREETS)[rng.integers(len(STREETS), size=n)]),
+        'CITY': [c[1] for c in info],
+        'STATE': 'Massachusetts',
+        'COUNTY': np.array(list(COUNTIES))[county],
+        'ZIP': np.where(rng.random(n) < 0.54, [c[2] for c in info], ''),
+        'LAT': np.array([c[3] for c in info], dtype=float) + rng.normal(0, 0.08, n),
+        'LON': np.array([c[4] for c in info], dtype=float) + rng.normal(0, 0.08, n),
+        'HEALTHCARE_EXPENSES': rng.gamma(2.0, 4e5, n).round(2),
+        'HEALTHCARE_COVERAGE': rng.lognormal(8.7, 1.2, n).round(2),
+    }, PATIENT_COLUMNS, n)
+
+    odds = np.ones(n)
+    for column, factors in TREATMENT_SKEW.items():
+        for value, factor in factors.items():
+            odds[demographics[column] == value] *= factor
+    odds[birth_year <= 2024 - 65] *= OVER_65_SKEW
+    # Older patients visit more often; a gamma draw gives the long tail of frequent visitors.
+    visits = rng.gamma(1.5, 1.0, n) * (1 + np.clip(2024 - birth_year, 0, 100) / 40)
+    return frame, odds, visits
+
+
+def encounter_chunk(seed, chunk, start, n, odds, visits_cdf, n_patients, pools):
+    rng = _rng(seed, 1, chunk)
+    patient = np.minimum(np.searchsorted(visits_cdf, rng.random(n) * visits_cdf[-1]), n_patients - 1)
+    classes = list(ENCOUNTER_CLASSES)
+    base = np.array(list(ENCOUNTER_CLASSES.values()))
+    treated = np.array([c in ('inpatient', 'emergency') for c in classes])
+    # Scale the treatment classes by each patient's odds and renormalise the rest.
+    p_treated = np.minimum(base[treated].sum() * odds[patient], 0.9)
+    u = rng.random(n)
+    is_treated = u < p_treated
+    treated_idx, other_idx = np.flatnonzero(treated), np.flatnonzero(~treated)
+    within = np.where(is_treated, u / p_treated, (u - p_treated) / (1 - p_treated))
+    treated_cdf = np.cumsum(base[treated]) / base[treated].sum()
+    other_cdf = np.cumsum(base[~treated]) / base[~treated].sum()
+    encounter_class = np.where(
+        is_treated, treated_idx[np.minimum(np.searchsorted(treated_cdf, within), len(treated_idx) - 1)],
+        other_idx[np.minimum(np.searchsorted(other_cdf, within), len(other_idx) - 1)])
+
+    span = int((END_DATE - START_DATE) / np.timedelta64(1, 's'))
+    start_time = START_DATE + rng.integers(span, size=n).astype('timedelta64[s]')
+    minutes = np.where(np.array(classes)[encounter_class] == 'inpatient', rng.integers(1440, 10080, size=n),
+                       rng.integers(15, 120, size=n))
+    cost = rng.gamma(2.0, 60.0, n).round(2)
+    return _table({
+        'Id': uuids(np.arange(start, start + n), seed, 1),
+        'START': _timestamps(start_time),
+        'STOP': _timestamps(start_time + minutes.astype('timedelta64[m]')),
+        'PATIENT': uuids(patient.astype(np.uint64), seed, 0),
+        'ORGANIZATION': pools['ORGANIZATION'][rng.integers(len(pools['ORGANIZATION']), size=n)],
+        'PROVIDER': pools['PROVIDER'][rng.integers(len(pools['PROVIDER']), size=n)],
+        'PAYER': pools['PAYER'][rng.integers(len(pools['PAYER']), size=n)],
+        'ENCOUNTERCLASS': np.array(classes)[encounter_class],
+        'CODE': rng.choice([185345009, 162673000, 50849002, 183452005], size=n),
+        'DESCRIPTION': 'Encounter for problem',
+        'BASE_ENCOUNTER_COST': cost,
+        'TOTAL_CLAIM_COST': (cost * rng.uniform(1, 3, n)).round(2),
+        'PAYER_COVERAGE': (cost * rng.uniform(0, 1, n)).round(2),
+        'REASONCODE': '',
+        'REASONDESCRIPTION': '',
+    }, ENCOUNTER_COLUMNS, n)
+
+
+def write_csv(path, tables):
+    writer = None
+    for table in tables:
+        writer = writer or pa_csv.CSVWriter(path, table.schema)
+        writer.write_table(table)
+    if writer:
+        writer.close()
+
+
+def generate(out_dir, encounters, patients=None, seed=42):
+    """Write patients.csv and encounters.csv to out_dir; the same arguments give byte-identical files."""
+    patients = patients or max(100, encounters // 20)
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    odds, visits = [], []
+
+    def patient_tables():
+        for chunk, offset in enumerate(range(0, patients, CHUNK_ROWS)):
+            table, chunk_odds, chunk_visits = patient_chunk(seed, chunk, offset, min(CHUNK_ROWS, patients - offset))
+            odds.append(chunk_odds)
+            visits.append(chunk_visits)
+            yield table
+
+    patients_path = os.path.join(out_dir, 'patients.csv')
+    write_csv(patients_path, patient_tables())
+    odds, visits_cdf = np.concatenate(odds), np.cumsum(np.concatenate(visits))
+
+    # Synthea-sized pools of organizations, providers and payers, shared by every chunk.
+    pools = {name: uuids(np.arange(size), seed, stream)
+             for stream, (name, size) in enumerate({'ORGANIZATION': 500, 'PROVIDER': 5000, 'PAYER': 10}.items(), 2)}
+    encounters_path = os.path.join(out_dir, 'encounters.csv')
+    write_csv(encounters_path, (encounter_chunk(seed, chunk, offset, min(CHUNK_ROWS, encounters - offset), odds,
+                                                visits_cdf, patients, pools)
+                                for chunk, offset in enumerate(range(0, encounters, CHUNK_ROWS))))
+    elapsed = time.perf_counter() - start
+    print(f"Generated {patients} patients and {encounters} encounters in {elapsed:.1f}s "
+          f"({(patients + encounters) / elapsed:,.0f} rows/s); saved to {out_dir}")
+    return patients_path, encounters_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate Synthea-like patients.csv and encounters.csv")
+    parser.add_argument('out_dir')
+    parser.add_argument('--encounters', type=float, default=1e5, help="Encounter rows, e.g. 1e6")
+    parser.add_argument('--patients', type=float, default=None, help="Patient rows (default: encounters / 20)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    generate(args.out_dir, int(args.encounters), int(args.patients) if args.patients else None, args.seed)
@@ -0,0 +1,127 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+# Run as a script (python benchmarks/run.py), the path starts at benchmarks/ rather than the project root.
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks import suite
+from benchmarks.generate import generate
+
+DATA_DIR = os.path.join(BASE_DIR, "data")
+HISTORY_PATH = os.path.join(PROJECT_ROOT, "results", "benchmark_history.json")
+
+# Flag a benchmark when it got this much slower or bigger than at the previous commit, and by
+# more than timer/allocator noise.
+REGRESSION_THRESHOLD = 0.2
+MIN_CHANGE = {'seconds': 0.05, 'peak_rss_mb': 16, 'first_render_s': 0.05}
+
+
+def git_commit():
+    """HEAD's short hash, suffixed with -dirty when tracked files have uncommitted changes."""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=PROJECT_ROOT, capture_output=True, text=True).stdout.strip()
+
+    commit = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    return commit + ('-dirty' if git('status', '--porcelain', '--untracked-files=no') else '')
+
+
+def dataset(encounters, seed, data_dir=DATA_DIR):
+    """Directory with generated patients/encounters for this size and seed, generating them once."""
+    workdir = os.path.join(data_dir, f"{encounters}-seed{seed}")
+    p = suite.paths(workdir)
+    if not (os.path.exists(p['patients']) and os.path.exists(p['encounters'])):
+        generate(workdir, encounters, seed=seed)
+    return workdir
+
+
+def load_history(path=HISTORY_PATH):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def previous_results(history, commit):
+    """Results of the most recent other commit, keyed by (benchmark, dataset size)."""
+    for key in reversed(list(history)):
+        if key != commit:
+            return {(r['benchmark'], r['encounters']): r for r in history[key]['results']}
+    return {}
+
+
+def regressions(result, before, threshold=REGRESSION_THRESHOLD):
+    if before is None:
+        return []
+    flagged = []
+    for metric, min_change in MIN_CHANGE.items():
+        if metric not in result or metric not in before:
+            continue
+        if result[metric] > before[metric] * (1 + threshold) and result[metric] - before[metric] > min_change:
+            flagged.append(f"{metric} {before[metric]:.2f} -> {result[metric]:.2f}")
+    return flagged
+
+
+def over_budget(result):
+    """Benchmarks with a budget (the dashboard's time-to-first-render) report it as budget_s."""
+    if 'budget_s' in result and result['first_render_s'] > result['budget_s']:
+        return [f"first_render_s {result['first_render_s']:.2f} over the {result['budget_s']:.2f}s budget"]
+    return []
+
+
+def run(sizes, names=None, seed=42, history_path=HISTORY_PATH, threshold=REGRESSION_THRESHOLD):
+    names = names or list(suite.BENCHMARKS)
+    commit = git_commit()
+    history = load_history(history_path)
+    before = previous_results(history, commit)
+    results, flagged = [], []
+    context = multiprocessing.get_context('spawn')
+    for encounters in sizes:
+        workdir = dataset(encounters, seed)
+        p = suite.paths(workdir)
+        # Also run earlier benchmarks whose outputs a selected one would need but are missing.
+        selected = [n for n, (_, outputs) in suite.BENCHMARKS.items()
+                    if n in names or not all(os.path.exists(p[o]) for o in outputs)]
+        for name in selected:
+            # One fresh process per benchmark, so peak RSS is that benchmark's own.
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                result = pool.submit(suite.run_benchmark, name, workdir).result()
+            result['encounters'] = encounters
+            results.append(result)
+            problems = regressions(result, before.get((name, encounters)), threshold) + over_budget(result)
+            flagged += [f"{name} @ {encounters}: {problem}" for problem in problems]
+            print(f"{name:>15} @ {encounters:>10,}: {result['seconds']:8.2f}s  {result['rows_per_s']:>14,.0f} rows/s  "
+                  f"{result['peak_rss_mb']:8.1f} MB peak" + ("  REGRESSION" if problems else ""))
+
+    # Rerunning at the same commit replaces its matching results and moves it to the end.
+    entry = history.pop(commit, {'results': []})
+    merged = {(r['benchmark'], r['encounters']): r for r in entry['results'] + results}
+    history[commit] = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                       'cpu_count': os.cpu_count(), 'seed': seed, 'results': list(merged.values())}
+    with open(history_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    print(f"Benchmark results for {commit} saved to {history_path}")
+    for line in flagged:
+        print(f"Regression: {line}")
+    return results, flagged
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time each pipeline stage on generated Synthea-like data")
+    parser.add_argument('--rows', type=float, nargs='+', default=[1e5],
+                        help="Encounter rows per dataset, e.g. --rows 1e4 1e6")
+    parser.add_argument('--only', nargs='+', choices=list(suite.BENCHMARKS), help="Run a subset of benchmarks")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+    _, flagged = run([int(r) for r in args.rows], args.only, args.seed, threshold=args.threshold)
+    raise SystemExit(1 if flagged else 0)
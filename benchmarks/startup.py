@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+SRC_DIR = os.path.join(PROJECT_ROOT, "src")
+APP_PATH = os.path.join(SRC_DIR, "dashboard.py")
+
+# Pages visited after the first render; they should be cheap once the first page is out.
+PAGES = ("Help", "Risk Scores", "SHAP Analysis")
+
+
+def _peak_rss_mb():
+    # As instrumentation.peak_rss_mb, which can't be imported here without importing the app's modules first.
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def measure(pages=PAGES):
+    """Time-to-first-render of the dashboard, then the first visit to each of `pages`, in seconds.
+
+    Only meaningful in a fresh interpreter: modules already imported are not counted.
+    """
+    sys.path.insert(0, SRC_DIR)
+    # A Streamlit server has Streamlit itself loaded before any session starts.
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    started = time.perf_counter()
+    app.run()
+    result = {'first_render_s': time.perf_counter() - started}
+    for page in pages:
+        started = time.perf_counter()
+        app.sidebar.radio[0].set_value(page).run()
+        result[page.lower().replace(' ', '_') + '_s'] = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(f"Dashboard raised: {app.exception[0].value}")
+
+    import dashboard_common
+
+    result['budget_s'] = dashboard_common.STARTUP_BUDGET_SECONDS
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure()))
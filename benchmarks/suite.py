@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import joblib
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+
+# Imported up front so import time stays out of the measurements.
+import cube
+import data_cache
+import instrumentation
+import preprocess_data
+import risk_table
+import scoring_service
+import training
+from explanations import background_weights, cell_index, cell_table, group_table
+from fairness_engine import SENSITIVE_FEATURES, group_metrics
+from feature_store import read_features
+
+ONLINE_REQUESTS = 20000
+
+
+def paths(workdir):
+    """Where each stage reads and writes inside one benchmark data directory."""
+    return {name: os.path.join(workdir, file) for name, file in {
+        'patients': 'patients.csv', 'encounters': 'encounters.csv', 'features': 'preprocessed_data.parquet',
+        'cube': 'demographic_cube.parquet', 'model': 'model.pkl', 'risk_model': 'risk_model.pkl',
+        'risk_table': 'risk_table.npz', 'scores': 'risk_scores.parquet'}.items()}
+
+
+def bench_preprocess(workdir):
+    p = paths(workdir)
+    return preprocess_data.preprocess(p['patients'], p['encounters'], p['features'], cube_path=p['cube'])
+
+
+def bench_train_bias(workdir):
+    p = paths(workdir)
+    cells = training.load_cells(p['features'])
+    train_cells, _ = training.split_counts(cells)
+    joblib.dump(training.fit('bias', train_cells), p['model'])
+    return int(cells['count'].sum()), {'cells': len(cells)}
+
+
+def bench_train_risk(workdir):
+    p = paths(workdir)
+    cells = training.load_cells(p['features'])
+    train_cells, _ = training.split_counts(cells)
+    joblib.dump(training.fit('risk', train_cells), p['risk_model'])
+    risk_table.build(p['risk_model'], p['risk_table'])
+    return int(cells['count'].sum()), {'cells': len(cells)}
+
+
+def bench_fairness(workdir):
+    p = paths(workdir)
+    model = joblib.load(p['model'])
+    _, test_cells = training.split_counts(training.load_cells(p['features']))
+    counts = test_cells[SENSITIVE_FEATURES].assign(
+        y_true=test_cells[training.LABEL].astype('int8'),
+        y_pred=model.predict(test_cells[SENSITIVE_FEATURES]).astype('int8'),
+        count=test_cells['count'])
+    group_metrics(counts)
+    return int(test_cells['count'].sum())
+
+
+def bench_shap(workdir):
+    p = paths(workdir)
+    model, risk_model = joblib.load(p['model']), joblib.load(p['risk_model'])
+    train_cells, test_cells = training.split_counts(training.load_cells(p['features']))
+    background = background_weights(train_cells, train_cells['count'])
+    test_counts = np.bincount(cell_index(test_cells), weights=test_cells['count'],
+                              minlength=len(background)).astype(np.int64)
+    cells = [cell_table('model', model.decision_function, background, test_counts),
+             cell_table('risk_model', lambda X: risk_model.predict_proba(X)[:, 1], background, test_counts)]
+    group_table(cells[0])
+    group_table(cells[1])
+    return int(test_counts.sum())
+
+
+def bench_scoring_bulk(workdir):
+    p = paths(workdir)
+    report = scoring_service.score_file(p['features'], p['scores'], model_path=p['risk_model'],
+                                        table_path=p['risk_table'])
+    return report['rows'], {'chunk_p50_ms': report['p50_ms'], 'chunk_p99_ms': report['p99_ms']}
+
+
+def bench_scoring_online(workdir):
+    """Single-patient requests through the micro-batcher, without the HTTP layer."""
+    p = paths(workdir)
+    scorer = scoring_service.Scorer(p['risk_model'], p['risk_table'])
+    rng = np.random.default_rng(0)
+    requests = [{'GENDER': np.array([g]), 'RACE': np.array([r]), 'ETHNICITY': np.array([e])}
+                for g, r, e in zip(rng.integers(0, 3, ONLINE_REQUESTS), rng.integers(-1, 1, ONLINE_REQUESTS),
+                                   rng.integers(-1, 2, ONLINE_REQUESTS))]
+
+    async def run():
+        batcher = scoring_service.MicroBatcher(scorer, max_queue=ONLINE_REQUESTS)
+        worker = asyncio.create_task(batcher.run())
+        loop = asyncio.get_running_loop()
+
+        async def one(X):
+            started = loop.time()
+            await batcher.submit(X)
+            batcher.request_stats.record(loop.time() - started, 1)
+
+        await asyncio.gather(*(one(X) for X in requests))
+        worker.cancel()
+        return batcher.metrics()
+
+    metrics = asyncio.run(run())
+    return metrics['rows'], {'request_p50_ms': metrics['p50_ms'], 'request_p99_ms': metrics['p99_ms'],
+                             'mean_batch_rows': metrics['mean_batch_rows']}
+
+
+def bench_dashboard_load(workdir):
+    """The loads behind the Home and Risk Scores pages: cold through a fresh cache, then warm."""
+    p = paths(workdir)
+    cache = data_cache.DataCache()
+    columns = ('GENDER', 'RACE', 'ETHNICITY', 'TREATMENT')
+
+    def load_all():
+        cache.load(p['cube'], lambda: cube.load(p['cube']))
+        features = cache.load(p['features'], lambda: read_features(list(columns), p['features']), key=columns)
+        cache.load(p['risk_table'], lambda: risk_table.load_table(p['risk_table'], p['risk_model']),
+                   depends_on=[p['risk_model']])
+        return len(features)
+
+    started = time.perf_counter()
+    rows = load_all()
+    cold = time.perf_counter() - started
+    started = time.perf_counter()
+    load_all()
+    return rows, {'cold_ms': cold * 1000, 'warm_ms': (time.perf_counter() - started) * 1000}
+
+
+def bench_dashboard_startup(workdir):
+    """Cold start of the dashboard in a fresh interpreter (see startup.py). The dashboard reads the
+    project's own data, so unlike the others this does not depend on the dataset size."""
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.startup'], cwd=PROJECT_ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    if result['peak_rss_mb'] is None:
+        del result['peak_rss_mb']
+    # The child's own peak RSS (when known) replaces this process's in the benchmark result.
+    return 1, result
+
+
+# In dependency order: each benchmark reads what the ones before it wrote.
+BENCHMARKS = {
+    'preprocess': (bench_preprocess, ['features', 'cube']),
+    'train_bias': (bench_train_bias, ['model']),
+    'train_risk': (bench_train_risk, ['risk_model', 'risk_table']),
+    'fairness': (bench_fairness, []),
+    'shap': (bench_shap, []),
+    'scoring_bulk': (bench_scoring_bulk, []),
+    'scoring_online': (bench_scoring_online, []),
+    'dashboard_load': (bench_dashboard_load, []),
+    'dashboard_startup': (bench_dashboard_startup, []),
+}
+
+
+def run_benchmark(name, workdir):
+    """Run one benchmark in this (fresh) worker process; returns its measurements."""
+    started = time.perf_counter()
+    result = BENCHMARKS[name][0](workdir)
+    seconds = time.perf_counter() - started
+    rows, extra = result if isinstance(result, tuple) else (result, {})
+    return dict({'benchmark': name, 'rows': int(rows), 'seconds': seconds,
+                 'rows_per_s': rows / seconds if seconds else 0.0, 'peak_rss_mb': instrumentation.peak_rss_mb()}, **extra)
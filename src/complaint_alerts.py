@@ -0,0 +1,68 @@
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import event_store
+
+WINDOWS = {'1h': timedelta(hours=1), '24h': timedelta(hours=24), '7d': timedelta(days=7)}
+DIMENSIONS = ['category', 'department']
+
+# A rule fires when a category (or department) has more than `threshold` complaints in the window.
+ALERT_RULES = [
+    {'dimension': 'category', 'window': '1h', 'threshold': 2},
+    {'dimension': 'category', 'window': '24h', 'threshold': 5},
+    {'dimension': 'category', 'window': '7d', 'threshold': 10},
+    {'dimension': 'department', 'window': '24h', 'threshold': 5},
+]
+
+
+def _check(dimension, window=None):
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown complaint dimension: {dimension}")
+    if window is not None and window not in WINDOWS and window != 'all':
+        raise ValueError(f"Unknown complaint window: {window}")
+
+
+def _cutoff(window, at=None):
+    """Start of the oldest 5-minute bucket that overlaps the window ending at `at`."""
+    start = ((at or datetime.now()) - WINDOWS[window]).timestamp()
+    start = start // event_store.BUCKET_SECONDS * event_store.BUCKET_SECONDS
+    return datetime.fromtimestamp(start).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def window_counts(dimension='category', window='24h', at=None, path=event_store.DB_PATH):
+    """Complaints per category/department in a sliding window (or 'all' time), from the counters.
+
+    Reads at most one counter row per key and 5-minute bucket in the window, however long the
+    complaint log is.
+    """
+    _check(dimension, window)
+    with closing(event_store.connect(path)) as conn:
+        if window == 'all':
+            rows = conn.execute(f"SELECT {dimension}, SUM(n) FROM complaint_totals GROUP BY {dimension}").fetchall()
+        else:
+            rows = conn.execute(f"SELECT {dimension}, SUM(n) FROM complaint_counts WHERE bucket >= ? "
+                                f"GROUP BY {dimension}", (_cutoff(window, at),)).fetchall()
+    counts = pd.Series(dict(rows), name='count', dtype='int64')
+    return counts[counts.index != ''].sort_values(ascending=False)
+
+
+def evaluate(rules=ALERT_RULES, at=None, path=event_store.DB_PATH):
+    """Fired alerts, one dict per (rule, key) over its threshold."""
+    alerts = []
+    cache = {}
+    for rule in rules:
+        key = (rule['dimension'], rule['window'])
+        if key not in cache:
+            cache[key] = window_counts(rule['dimension'], rule['window'], at, path)
+        counts = cache[key]
+        for name, n in counts[counts > rule['threshold']].items():
+            alerts.append(dict(rule, key=name, count=int(n)))
+    return alerts
+
+
+def prune(older_than='7d', at=None, path=event_store.DB_PATH):
+    """Drop windowed buckets no rule can reach any more; all-time totals are kept."""
+    with closing(event_store.connect(path)) as conn, conn:
+        return conn.execute("DELETE FROM complaint_counts WHERE bucket < ?", (_cutoff(older_than, at),)).rowcount
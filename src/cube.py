@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+CUBE_PATH = os.path.join(PROJECT_ROOT, "data", "demographic_cube.parquet")
+
+DIMENSIONS = ['GENDER', 'RACE', 'ETHNICITY', 'ENCOUNTERCLASS', 'COUNTY', 'BIRTH_DECADE']
+MEASURES = ['n', 'treated']
+
+
+def patient_dimensions(patients):
+    """COUNTY (falling back to ZIP) and BIRTH_DECADE columns derived from raw patient fields."""
+    county = patients['COUNTY'].fillna(patients['ZIP']).fillna('Unknown').astype('category')
+    years = pd.to_datetime(patients['BIRTHDATE'], errors='coerce').dt.year
+    decade = (years // 10 * 10).fillna(-1).astype('int16')
+    return county, decade
+
+
+def aggregate(data):
+    """Counts and treated counts per cell of whichever cube dimensions `data` has."""
+    dims = [d for d in DIMENSIONS if d in data.columns]
+    frame = data[dims].copy()
+    frame['treated'] = data['TREATMENT'].astype('int64')
+    cube = frame.groupby(dims, observed=True, sort=False).agg(n=('treated', 'size'), treated=('treated', 'sum'))
+    return cube.reset_index()
+
+
+def merge(cubes):
+    """Combine cubes built over disjoint rows (e.g. preprocessing chunks); measures are additive."""
+    cubes = [c for c in cubes if c is not None and len(c)]
+    if not cubes:
+        return None
+    combined = pd.concat(cubes, ignore_index=True)
+    dims = [d for d in DIMENSIONS if d in combined.columns]
+    for d in dims:
+        if combined[d].dtype == object:
+            combined[d] = combined[d].astype('category')
+    return combined.groupby(dims, observed=True, sort=False)[MEASURES].sum().reset_index()
+
+
+def write(cube, path=CUBE_PATH):
+    """Write to <path>.tmp and rename, so readers never see a partial cube."""
+    tmp_path = path + '.tmp'
+    try:
+        cube.to_parquet(tmp_path, index=False)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def load(path=CUBE_PATH):
+    return pd.read_parquet(path)
+
+
+def attach_risk(cube, table):
+    """Add each cell's risk score; risk depends only on demographics, so this is exact."""
+    return cube.assign(risk_score=table.score(cube))
+
+
+def slice_cube(cube, **filters):
+    """Cells matching every filter; a filter value may be a single value or a list of values."""
+    mask = np.ones(len(cube), dtype=bool)
+    for dim, value in filters.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        mask &= cube[dim].isin(values).to_numpy()
+    return cube[mask]
+
+
+def rollup(cube, dims):
+    """Sum the cube up to `dims`, with treatment rate and count-weighted mean risk score."""
+    frame = cube.copy()
+    measures = list(MEASURES)
+    if 'risk_score' in frame.columns:
+        frame['risk_weight'] = frame['risk_score'] * frame['n']
+        measures.append('risk_weight')
+    rolled = frame.groupby(list(dims), observed=True)[measures].sum().reset_index()
+    rolled['treatment_rate'] = rolled['treated'] / rolled['n']
+    if 'risk_weight' in rolled.columns:
+        rolled['mean_risk_score'] = rolled.pop('risk_weight') / rolled['n']
+    return rolled
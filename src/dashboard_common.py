@@ -0,0 +1,158 @@
+import os
+import threading
+from functools import partial
+
+import pandas as pd
+import streamlit as st
+
+import cube
+import dashboard_pages
+import data_cache
+import event_store
+import instrumentation
+import risk_table
+from fairness_engine import read_metrics
+from feature_store import CSV_PATH, STORE_PATH, read_features
+
+# Dynamic path resolution
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # src/
+PROJECT_ROOT = os.path.dirname(BASE_DIR)  # Root of the project
+DATA_PATH = os.path.join(PROJECT_ROOT, "data")
+MODELS_PATH = os.path.join(PROJECT_ROOT, "models")
+RESULTS_PATH = os.path.join(PROJECT_ROOT, "results")
+PROFILES_PATH = os.path.join(RESULTS_PATH, "profiles")
+
+# Time from the start of a session's first script run to its first page being rendered.
+# The first session of a server process also pays for the imports (cold start).
+STARTUP_BUDGET_SECONDS = float(os.environ.get("HD_STARTUP_BUDGET", 2.0))
+
+def load_data(file_path):
+    """Load a CSV through the shared cache; it is re-read only when the file changes on disk."""
+    if not os.path.exists(file_path):
+        st.error(f"File not found: {file_path}")
+        return pd.DataFrame()
+    try:
+        with instrumentation.timer("load_data", file=os.path.basename(file_path)):
+            return data_cache.load_csv(file_path)
+    except Exception as e:
+        st.error(f"Error loading file {file_path}: {e}")
+        return pd.DataFrame()
+
+def load_cube():
+    """Encounter counts per demographic cell, pre-aggregated by preprocess_data.py."""
+    if os.path.exists(cube.CUBE_PATH):
+        with instrumentation.timer("load_data", file=os.path.basename(cube.CUBE_PATH)):
+            return data_cache.load(cube.CUBE_PATH, lambda: cube.load(cube.CUBE_PATH))
+    # Feature stores written before the cube existed: aggregate the demographic columns once.
+    store_path = STORE_PATH if os.path.exists(STORE_PATH) else CSV_PATH
+    if not os.path.exists(store_path):
+        st.error("Preprocessed data not found. Please run preprocess_data.py first.")
+        return pd.DataFrame()
+    columns = ["GENDER", "RACE", "ETHNICITY", "ENCOUNTERCLASS", "TREATMENT"]
+    return data_cache.load(store_path, lambda: cube.aggregate(read_features(columns)), key=("cube",))
+
+def load_fairness_metrics(file_path):
+    """Load the tidy per-group fairness table written by fairness_analysis.py."""
+    if not os.path.exists(file_path):
+        st.error(f"File not found: {file_path}")
+        return pd.DataFrame()
+    return data_cache.load(file_path, lambda: read_metrics(file_path))
+
+def load_model(model_path):
+    if not os.path.exists(model_path):
+        st.error(f"Model file not found: {model_path}")
+        return None
+    import joblib  # Only needed when the risk table is unusable; unpickling imports scikit-learn.
+    with instrumentation.timer("load_model", file=os.path.basename(model_path)):
+        return data_cache.load(model_path, lambda: joblib.load(model_path))
+
+def load_risk_table(table_path, model_path):
+    """Load the compiled risk lookup table; None if missing or out of date with the model."""
+    if not os.path.exists(table_path) or not os.path.exists(model_path):
+        return None
+    try:
+        return data_cache.load(table_path, lambda: risk_table.load_table(table_path, model_path),
+                               depends_on=[model_path])
+    except risk_table.StaleTableError as e:
+        st.warning(str(e))
+        return None
+
+def score_risk(X):
+    """Risk scores from the compiled table, falling back to the pickled model."""
+    model_path = os.path.join(MODELS_PATH, "risk_model.pkl")
+    table = load_risk_table(os.path.join(MODELS_PATH, "risk_table.npz"), model_path)
+    if table is not None:
+        with instrumentation.timer("risk_table_score", rows=len(X), caller="dashboard"):
+            return table.score(X)
+    model = load_model(model_path)
+    if model is None:
+        return None
+    with instrumentation.timer("predict_proba", rows=len(X), caller="dashboard"):
+        return model.predict_proba(X[risk_table.FEATURES])[:, 1]
+
+@st.cache_resource
+def init_event_store():
+    """Create the event store and import any legacy CSV logs, once per server process."""
+    event_store.migrate_csvs()
+    return True
+
+def show_events(table, key, page_size=25, **filters):
+    """Render one page of an event table, newest first."""
+    total = event_store.count(table, **filters)
+    if total == 0:
+        return 0
+    pages = (total - 1) // page_size + 1
+    page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+    events = event_store.query(table, limit=page_size, offset=(page_number - 1) * page_size, **filters)
+    st.dataframe(events, use_container_width=True)
+    st.caption(f"Showing {len(events)} of {total} entries")
+    return total
+
+def play_alert():
+    try:
+        with open(os.path.join(BASE_DIR, "alert.wav"), "rb") as f:
+            audio_bytes = f.read()
+        st.audio(audio_bytes, format="audio/wav")
+    except FileNotFoundError:
+        st.warning("Alert sound file not found.")
+
+_first_render_lock = threading.Lock()
+_cold = True
+
+def record_first_render(seconds, page):
+    """Time-to-first-render of a session; the first one in the process is the cold start."""
+    global _cold
+    with _first_render_lock:
+        start, _cold = ("cold" if _cold else "warm"), False
+    instrumentation.registry.observe("dashboard_first_render", seconds, page=page, start=start)
+    return start
+
+def warm_up():
+    """Import every page (and so the plotting libraries) and preload the files the pages read,
+    so that the first visit to each page is not a cold load. Runs outside any session, so files
+    that are missing or fail to load are skipped here and reported by their page instead."""
+    model_path = os.path.join(MODELS_PATH, "risk_model.pkl")
+    table_path = os.path.join(MODELS_PATH, "risk_table.npz")
+    csv_paths = [os.path.join(RESULTS_PATH, name)
+                 for name in ["fairness_metrics.csv", "fairness_summary.csv", "shap_groups.csv", "shap_cells.csv"]]
+    loads = [(cube.CUBE_PATH, load_cube), (csv_paths[0], partial(load_fairness_metrics, csv_paths[0])),
+             *[(path, partial(load_data, path)) for path in csv_paths[1:]],
+             (table_path, lambda: load_risk_table(table_path, model_path) or load_model(model_path))]
+    with instrumentation.timer("dashboard_warm_up"):
+        for page in dashboard_pages.PAGES:
+            dashboard_pages.load(page)
+        import plotly.tools  # What st.plotly_chart imports on its first call.
+        for path, load in loads:
+            if not os.path.exists(path):
+                continue
+            try:
+                load()
+            except Exception:
+                pass
+
+@st.cache_resource
+def start_warm_up():
+    """Start warm_up() in a background thread, once per server process."""
+    thread = threading.Thread(target=warm_up, name="dashboard-warm-up", daemon=True)
+    thread.start()
+    return thread
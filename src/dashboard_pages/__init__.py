@@ -0,0 +1,22 @@
+import importlib
+
+# Sidebar label -> module in this package. Each module has a render() function and is only
+# imported the first time its page is shown, so the plotting libraries and data behind one page
+# cost nothing on the others.
+PAGES = {
+    "Home": "home",
+    "Disparity Metrics": "disparity_metrics",
+    "Risk Scores": "risk_scores",
+    "Interventions": "interventions",
+    "Audit Log": "audit_log",
+    "Predict Risk": "predict_risk",
+    "SHAP Analysis": "shap_analysis",
+    "Feedback": "feedback",
+    "Report Disparity": "report_disparity",
+    "Help": "help",
+    "Performance": "performance",
+}
+
+
+def load(page):
+    return importlib.import_module(f"{__name__}.{PAGES[page]}")
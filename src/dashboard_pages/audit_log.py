@@ -0,0 +1,14 @@
+import streamlit as st
+
+import event_store
+from dashboard_common import show_events
+
+def render():
+    st.title("Audit Log")
+    st.markdown("Track all implemented interventions.")
+    if show_events("audit_log", "audit"):
+        if st.button("Prepare Audit Report"):
+            data = event_store.query("audit_log", limit=None)
+            st.download_button("Download Audit Report", data.to_csv(index=False), "audit_log.csv", "text/csv")
+    else:
+        st.info("No audit logs available yet.")
@@ -0,0 +1,57 @@
+import os
+
+import plotly.express as px
+import streamlit as st
+
+import data_cache
+from dashboard_common import RESULTS_PATH, load_data, load_fairness_metrics, play_alert
+
+def render():
+    st.title("Disparity Metrics")
+    st.markdown("Compare treatment rates across demographic groups to identify disparities.")
+    data = load_fairness_metrics(os.path.join(RESULTS_PATH, "fairness_metrics.csv"))
+    sensitive_features = data['sensitive_feature'].unique()
+    selected_sf = st.selectbox("Select Sensitive Feature", sensitive_features)
+    groups = data[data['sensitive_feature'] == selected_sf]['group'].unique()
+    selected_groups = st.multiselect("Select Groups", groups, default=groups)
+    filtered_data = data[(data['sensitive_feature'] == selected_sf) & (data['group'].isin(selected_groups))]
+    if not filtered_data.empty:
+        columns = {'group': 'Group', 'count': 'Count', 'selection_rate': 'Selection Rate',
+                   'tpr': 'True Positive Rate', 'fpr': 'False Positive Rate'}
+        columns = {k: v for k, v in columns.items() if k in filtered_data.columns}
+        st.dataframe(filtered_data[list(columns)].rename(columns=columns))
+        error_bars = {}
+        if 'selection_rate_low' in filtered_data.columns:
+            error_bars = {'error_y': filtered_data['selection_rate_high'] - filtered_data['selection_rate'],
+                          'error_y_minus': filtered_data['selection_rate'] - filtered_data['selection_rate_low']}
+        fig = px.bar(filtered_data, x='group', y='selection_rate', title=f"Selection Rates by {selected_sf}", color='group',
+                     labels={'group': 'Group', 'selection_rate': 'Selection Rate'}, **error_bars)
+        st.plotly_chart(fig, use_container_width=True)
+        summary_file = os.path.join(RESULTS_PATH, "fairness_summary.csv")
+        if os.path.exists(summary_file):
+            summary = load_data(summary_file)
+            summary = summary[summary['sensitive_feature'] == selected_sf]
+            if not summary.empty:
+                row = summary.iloc[0]
+                col1, col2 = st.columns(2)
+                col1.metric("Demographic Parity Difference", f"{row['demographic_parity_difference']:.3f}",
+                            help=f"95% CI {row['demographic_parity_difference_low']:.3f}-{row['demographic_parity_difference_high']:.3f}")
+                col2.metric("Equalized Odds Difference", f"{row['equalized_odds_difference']:.3f}",
+                            help=f"95% CI {row['equalized_odds_difference_low']:.3f}-{row['equalized_odds_difference_high']:.3f}")
+        if filtered_data['selection_rate'].max() - filtered_data['selection_rate'].min() > 0.1:
+            st.warning(f"Significant disparity detected in {selected_sf}!")
+            play_alert()
+    else:
+        st.warning("No data available for selected filters.")
+    drift_state = os.path.join(RESULTS_PATH, "drift_state.json")
+    if os.path.exists(drift_state):
+        import drift_monitor  # Joins encounters like preprocess_data, so it pulls in pyarrow; only needed here.
+
+        st.subheader("Live Drift Monitor")
+        status = data_cache.load(drift_state, lambda: drift_monitor.DriftMonitor(drift_state).status())
+        st.dataframe(status.rename(columns={"sensitive_feature": "Sensitive Feature", "live_gap": "Current Gap",
+                                            "last_block_gap": "Last Block Gap", "baseline_gap": "Baseline Gap",
+                                            "cusum_pos": "CUSUM (widening)", "cusum_neg": "CUSUM (narrowing)"}),
+                     use_container_width=True)
+        st.caption(f"Treatment-rate gaps on incoming encounters, kept up to date by drift_monitor.py "
+                   f"({drift_monitor.HALF_LIFE_DAYS:g}-day half-life). Drift alerts are written to the Audit Log.")
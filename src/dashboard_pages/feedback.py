@@ -0,0 +1,16 @@
+import streamlit as st
+
+import event_store
+from dashboard_common import play_alert, show_events
+
+def render():
+    st.title("Provide Feedback")
+    st.markdown("Share your thoughts to improve the system.")
+    feedback = st.text_area("Enter your feedback", height=150)
+    if st.button("Submit Feedback"):
+        event_store.add_feedback(feedback)
+        st.success("Feedback submitted!")
+        play_alert()
+    if event_store.count("feedback"):
+        st.subheader("Previous Feedback")
+        show_events("feedback", "feedback")
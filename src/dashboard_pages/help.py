@@ -0,0 +1,31 @@
+import os
+
+import streamlit as st
+
+from dashboard_common import DATA_PATH
+
+def render():
+    st.title("User Guide")
+    st.markdown("""
+    ### Welcome!
+    This dashboard helps you detect and address healthcare disparities. Here's how to navigate it:
+
+    - **Home**: See patient demographics and complaint alerts.
+    - **Disparity Metrics**: Compare treatment rates by group (e.g., Gender, Race).
+    - **Risk Scores**: Check risk score distributions for patients.
+    - **Interventions**: View and apply disparity solutions.
+    - **Audit Log**: Review implemented actions.
+    - **Predict Risk**: Assess treatment likelihood for a new patient.
+    - **SHAP Analysis**: Learn what drives predictions.
+    - **Feedback**: Share suggestions.
+    - **Report Disparity**: Log issues you notice.
+
+    ### Tips
+    - Use the sidebar to switch pages.
+    - Look for explanations under each section.
+    - Contact support for help!
+
+    ### Debug Information
+    - **Current working directory**: {}
+    - **Data directory contents**: {}
+    """.format(os.getcwd(), os.listdir(DATA_PATH) if os.path.exists(DATA_PATH) else "Data directory not found"))
@@ -0,0 +1,48 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import complaint_alerts
+import cube
+from dashboard_common import load_cube, play_alert
+
+def render():
+    st.title("Healthcare Disparities Dashboard")
+    st.markdown("Monitor and address disparities in patient care with real-time insights.")
+    cells = load_cube()
+    if not cells.empty:
+        filters = {}
+        with st.expander("Filter"):
+            for dim in ["ENCOUNTERCLASS", "COUNTY", "BIRTH_DECADE"]:
+                if dim in cells.columns:
+                    selected = st.multiselect(dim.replace("_", " ").title(), sorted(cells[dim].unique()))
+                    if selected:
+                        filters[dim] = selected
+        cells = cube.slice_cube(cells, **filters)
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = px.pie(cube.rollup(cells, ["GENDER"]), names="GENDER", values="n",
+                         title="Patient Distribution by Gender", hole=0.3)
+            fig.update_traces(textinfo="percent+label")
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = px.pie(cube.rollup(cells, ["RACE"]), names="RACE", values="n",
+                         title="Patient Distribution by Race", hole=0.3)
+            fig.update_traces(textinfo="percent+label")
+            st.plotly_chart(fig, use_container_width=True)
+    complaint_counts = complaint_alerts.window_counts("category", "all")
+    if not complaint_counts.empty:
+        alerts = complaint_alerts.evaluate()
+        if alerts:
+            details = "; ".join(f"{a['key']} ({a['count']} in {a['window']})" for a in alerts)
+            st.error(f"ALERT: High complaints in {details}. Authorities notified.")
+            play_alert()
+        fig = px.bar(complaint_counts, title="Complaints by Category", labels={'value': 'Count', 'index': 'Category'})
+        st.plotly_chart(fig, use_container_width=True)
+        recent = pd.DataFrame({window: complaint_alerts.window_counts("category", window)
+                               for window in complaint_alerts.WINDOWS}).fillna(0).astype(int)
+        if not recent.empty:
+            st.caption("Recent complaints by category")
+            st.dataframe(recent, use_container_width=True)
+    else:
+        st.info("No complaints reported yet.")
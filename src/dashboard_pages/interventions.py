@@ -0,0 +1,40 @@
+import os
+
+import streamlit as st
+
+import event_store
+from dashboard_common import RESULTS_PATH, load_fairness_metrics, play_alert
+from intervention_service import request_suggestions
+
+def render():
+    st.title("Suggested Interventions")
+    st.markdown("Review and implement tailored actions to address disparities.")
+    interventions_file = os.path.join(RESULTS_PATH, "interventions.txt")
+    if os.path.exists(interventions_file):
+        with open(interventions_file, "r", encoding='utf-8') as f:
+            intervention_text = f.read()
+        st.text_area("Suggested Interventions", intervention_text, height=200)
+        intervention_action = st.text_input("Enter custom intervention (optional)")
+        if st.button("Implement Intervention"):
+            action = intervention_action if intervention_action else intervention_text[:50] + '...'
+            event_store.log_action(f'Implemented: {action}')
+            st.success("Intervention logged!")
+            play_alert()
+    else:
+        st.error("Interventions file not found. Please run interventions.py to generate it.")
+    st.subheader("Fresh Suggestions")
+    metrics = load_fairness_metrics(os.path.join(RESULTS_PATH, "fairness_metrics.csv"))
+    if not metrics.empty:
+        feature = st.selectbox("Sensitive Feature", metrics['sensitive_feature'].unique())
+        refresh = st.checkbox("Ignore cached suggestion")
+        if st.button("Generate Suggestion"):
+            try:
+                with st.spinner("Generating..."):
+                    suggestions = request_suggestions([feature], refresh=refresh)
+            except Exception as e:
+                st.error(f"Intervention service error: {e}")
+            else:
+                if suggestions is None:
+                    st.info("Intervention service is not running. Start it with `python src/intervention_service.py`.")
+                else:
+                    st.text_area(f"Suggestion for {feature}", suggestions[feature], height=200)
@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+import data_cache
+import instrumentation
+from dashboard_common import STARTUP_BUDGET_SECONDS
+
+def render():
+    st.title("Performance")
+    st.markdown("Timers and counters for this server process, across all sessions since it started (or the last reset).")
+    snap = instrumentation.snapshot()
+    if snap["timers"]:
+        timers = pd.DataFrame(snap["timers"])
+        timers["labels"] = timers["labels"].apply(lambda labels: ", ".join(f"{k}={v}" for k, v in labels.items()))
+        st.dataframe(timers.sort_values("total_seconds", ascending=False).round(3), use_container_width=True)
+    else:
+        st.info("Nothing timed yet. Visit a few pages first.")
+    if snap["counters"]:
+        st.dataframe(pd.DataFrame(snap["counters"]), use_container_width=True)
+    st.subheader("Time to First Render")
+    budget_ms = STARTUP_BUDGET_SECONDS * 1000
+    slowest = {}
+    for t in snap["timers"]:
+        if t["name"] == "dashboard_first_render":
+            start = t["labels"]["start"]
+            slowest[start] = max(slowest.get(start, 0.0), t["max_ms"])
+    col1, col2 = st.columns(2)
+    for col, start in zip((col1, col2), ("cold", "warm")):
+        if start in slowest:
+            col.metric(f"Slowest {start} start", f"{slowest[start]:.0f} ms",
+                       delta=f"{slowest[start] - budget_ms:+.0f} ms vs budget", delta_color="inverse")
+    st.caption(f"From the start of a session's first run to its first page. The cold start is the first "
+               f"session after the server started, including imports. Budget: {budget_ms:.0f} ms (HD_STARTUP_BUDGET).")
+    if max(slowest.values(), default=0.0) > budget_ms:
+        st.warning("A first render went over the startup budget.")
+    st.subheader("Data Cache")
+    st.json(data_cache.cache.stats())
+    col1, col2, col3 = st.columns(3)
+    col1.download_button("Download JSON", instrumentation.to_json(snap), "metrics.json", "application/json")
+    col2.download_button("Download Prometheus", instrumentation.to_prometheus(snap), "metrics.prom", "text/plain")
+    if col3.button("Reset Metrics"):
+        instrumentation.reset()
+        st.rerun()
+    with st.expander("Prometheus text"):
+        st.code(instrumentation.to_prometheus(snap), language="text")
+
+    st.subheader("Profiling")
+    st.markdown("Sample the stacks of one rerun and save them as folded stacks for flamegraph.pl or speedscope.")
+    if st.button("Profile the next rerun"):
+        st.session_state["profile_next_rerun"] = True
+        st.success("The next page change or interaction will be profiled.")
+    last_profile = st.session_state.get("last_profile")
+    if last_profile and os.path.exists(last_profile["path"]):
+        st.markdown(f"Last profile: **{last_profile['page']}**, {last_profile['samples']} samples, saved to `{last_profile['path']}`")
+        st.dataframe(pd.DataFrame(last_profile["top"], columns=["frame", "samples"]), use_container_width=True)
+        with open(last_profile["path"]) as f:
+            st.download_button("Download Folded Stacks", f.read(), os.path.basename(last_profile["path"]), "text/plain")
@@ -0,0 +1,44 @@
+import pandas as pd
+import streamlit as st
+
+from dashboard_common import play_alert, score_risk
+
+def render():
+    st.title("Predict Patient Risk")
+    st.markdown("Calculate a patient's treatment likelihood based on demographics.")
+    col1, col2 = st.columns(2)
+    with col1:
+        gender = st.selectbox("Gender", [0, 1, 2], format_func=lambda x: {0: "Male", 1: "Female", 2: "Unknown"}[x])
+        race = st.selectbox("Race", [0, 1, 2, 3, 4, -1], format_func=lambda x: {0: "White", 1: "Black", 2: "Asian", 3: "Native", 4: "Other", -1: "Unknown"}[x])
+    with col2:
+        ethnicity = st.selectbox("Ethnicity", [0, 1, -1], format_func=lambda x: {0: "Non-Hispanic", 1: "Hispanic", -1: "Unknown"}[x])
+    if st.button("Predict"):
+        input_data = pd.DataFrame([[gender, race, ethnicity]], columns=["GENDER", "RACE", "ETHNICITY"])
+        scores = score_risk(input_data)
+        if scores is not None:
+            risk_score = scores[0]
+            st.success(f"Predicted Risk Score: {risk_score:.2f}")
+            st.markdown("""
+            ### How the Risk Score is Calculated
+            - **Model**: RandomForestClassifier
+            - **Inputs**: Gender, Race, Ethnicity
+            - **Output**: Probability (0 to 1) of receiving treatment
+            The model analyzes demographic patterns to predict treatment likelihood.
+            """)
+            if risk_score > 0.5:
+                st.warning("High risk detected!")
+                st.markdown("""
+                ### Mitigation Strategies
+                - Ensure equitable access to care.
+                - Review treatment protocols for potential bias.
+                - Provide additional resources if needed.
+                """)
+                play_alert()
+            else:
+                st.markdown("""
+                ### Mitigation Strategies
+                - Monitor for potential disparities.
+                - Ensure follow-up care is offered.
+                """)
+        else:
+            st.error("Failed to load risk model. Please ensure risk_model.pkl exists in the models directory.")
@@ -0,0 +1,28 @@
+import streamlit as st
+
+import event_store
+from dashboard_common import play_alert, show_events
+
+def render():
+    st.title("Report a Disparity")
+    st.markdown("Log any observed disparities for review.")
+    categories = ["Delayed Treatment", "Incorrect Diagnosis", "Resource Allocation", "Staff Bias", "Other"]
+    category = st.selectbox("Select Category", categories)
+    description = st.text_area("Describe the disparity", height=150)
+    department = st.text_input("Department/Location (optional)")
+    if st.button("Submit Report"):
+        event_store.add_complaint(category, description, department)
+        st.success("Report submitted!")
+        play_alert()
+    if event_store.count("complaints"):
+        st.subheader("Previous Reports")
+        col1, col2 = st.columns(2)
+        category_filter = col1.selectbox("Filter by Category", ["All"] + event_store.distinct("complaints", "category"))
+        department_filter = col2.selectbox("Filter by Department", ["All"] + event_store.distinct("complaints", "department"))
+        filters = {}
+        if category_filter != "All":
+            filters["category"] = category_filter
+        if department_filter != "All":
+            filters["department"] = department_filter
+        if not show_events("complaints", "complaints", **filters):
+            st.info("No reports match these filters.")
@@ -0,0 +1,38 @@
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+import cube
+import risk_table
+from dashboard_common import load_cube, score_risk
+
+def weighted_box(values, weights, name):
+    """Box trace from precomputed weighted quartiles, so no raw rows reach the browser."""
+    order = np.argsort(values)
+    values, weights = np.asarray(values)[order], np.asarray(weights)[order]
+    cum = np.cumsum(weights) / weights.sum()
+    q1, median, q3 = (values[np.searchsorted(cum, q)] for q in (0.25, 0.5, 0.75))
+    return go.Box(name=str(name), q1=[q1], median=[median], q3=[q3],
+                  lowerfence=[values[0]], upperfence=[values[-1]])
+
+def render():
+    st.title("Risk Scores")
+    st.markdown("View the distribution of patient risk scores across demographic groups.")
+    data = load_cube()
+    dimensions = [d for d in cube.DIMENSIONS if d in data.columns]
+    group_by = st.selectbox("Group By", dimensions) if dimensions else None
+    # Scores depend only on demographics, so scoring each cube cell scores the whole population.
+    cells = cube.rollup(data, list(dict.fromkeys(risk_table.FEATURES + [group_by]))) if group_by else None
+    scores = score_risk(cells) if cells is not None else None
+    if scores is not None:
+        cells["risk_score"] = scores
+        cells = cells.rename(columns={"n": "encounters"})
+        fig = go.Figure([weighted_box(group["risk_score"], group["encounters"], name)
+                         for name, group in cells.groupby(group_by, observed=True)])
+        fig.update_layout(title=f"Risk Score Distribution by {group_by}", xaxis_title=group_by.capitalize(),
+                          yaxis_title="Risk Score")
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("- **High scores** (near 1): Likely to receive treatment.\n- **Low scores** (near 0): Less likely to receive treatment.")
+        st.download_button("Download Risk Scores", cells.to_csv(index=False), "risk_scores.csv", "text/csv")
+    else:
+        st.error("Failed to load risk model. Please ensure risk_model.pkl exists in the models directory.")
@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from dashboard_common import RESULTS_PATH, load_data
+
+def render():
+    st.title("SHAP Analysis")
+    st.markdown("Understand how demographic features influence treatment predictions.")
+    groups_file = os.path.join(RESULTS_PATH, "shap_groups.csv")
+    cells_file = os.path.join(RESULTS_PATH, "shap_cells.csv")
+    shap_image = os.path.join(RESULTS_PATH, "shap_plot.png")
+    if os.path.exists(groups_file) and os.path.exists(cells_file):
+        model_names = {"model": "Bias detection model (log-odds)", "risk_model": "Risk model (probability)"}
+        model_name = st.selectbox("Model", list(model_names), format_func=model_names.get)
+        group_by = st.selectbox("Explain By Group", ["GENDER", "RACE", "ETHNICITY"])
+        groups = load_data(groups_file)
+        groups = groups[(groups["model"] == model_name) & (groups["sensitive_feature"] == group_by)]
+        fig = px.bar(groups, x="group", y="mean_shap", color="feature", barmode="group",
+                     title=f"Average Feature Impact by {group_by}", hover_data=["count", "mean_abs_shap"],
+                     labels={"group": group_by.capitalize(), "mean_shap": "Mean SHAP Value", "feature": "Feature"})
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.subheader("Explain a Demographic Profile")
+        cells = load_data(cells_file)
+        cells = cells[cells["model"] == model_name]
+        col1, col2, col3 = st.columns(3)
+        gender = col1.selectbox("Gender", sorted(cells["GENDER"].unique()))
+        race = col2.selectbox("Race", sorted(cells["RACE"].unique()))
+        ethnicity = col3.selectbox("Ethnicity", sorted(cells["ETHNICITY"].unique()))
+        cell = cells[(cells["GENDER"] == gender) & (cells["RACE"] == race) & (cells["ETHNICITY"] == ethnicity)].iloc[0]
+        contributions = pd.DataFrame({"Feature": ["GENDER", "RACE", "ETHNICITY"],
+                                      "SHAP Value": [cell["shap_GENDER"], cell["shap_RACE"], cell["shap_ETHNICITY"]]})
+        fig = px.bar(contributions, x="SHAP Value", y="Feature", orientation="h", color="SHAP Value",
+                     color_continuous_scale="RdBu_r", color_continuous_midpoint=0,
+                     title=f"Base value {cell['base_value']:.3f} -> prediction {cell['prediction']:.3f}")
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"{int(cell['count'])} test-set encounters have this profile.")
+    if os.path.exists(shap_image):
+        with st.expander("Summary Plot", expanded=not os.path.exists(groups_file)):
+            st.image(shap_image, caption="Feature Impact on Predictions")
+    if os.path.exists(shap_image) or os.path.exists(groups_file):
+        st.markdown("""
+        ### What is SHAP Analysis?
+        SHAP (SHapley Additive exPlanations) shows how each feature (e.g., Gender, Race) affects the model's prediction:
+        - **Positive values**: Features increasing the likelihood of treatment.
+        - **Negative values**: Features decreasing the likelihood.
+        - **Bar size**: Indicates the strength of the impact.
+        This helps identify which demographics most influence treatment decisions.
+        """)
+    else:
+        st.error("SHAP results not found. Please run shap_analysis.py to generate them.")
@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Shared by every dashboard session in the server process. Cached objects are handed out
+# as-is, so callers must treat them as read-only and copy before modifying.
+BUDGET_BYTES = int(os.environ.get('HD_CACHE_MB', 512)) * 1024 * 1024
+
+
+def _signature(paths):
+    stats = [os.stat(p) for p in paths]
+    return tuple((s.st_mtime_ns, s.st_size) for s in stats)
+
+
+def _nbytes(value, path):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    # Models and other objects: their file size is a reasonable proxy.
+    return os.path.getsize(path) if os.path.exists(path) else sys.getsizeof(value)
+
+
+class DataCache:
+    """LRU cache of loaded files, keyed on path, mtime and size, within a memory budget."""
+
+    def __init__(self, budget_bytes=BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        self.hits = self.misses = 0
+
+    def _store(self, key, entry):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old:
+                self.total_bytes -= old['nbytes']
+            self.entries[key] = entry
+            self.total_bytes += entry['nbytes']
+            while self.total_bytes > self.budget_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted['nbytes']
+
+    def load(self, path, loader, key=(), depends_on=()):
+        """Return loader() for path, reloading only when path or a dependency changed on disk."""
+        paths = [path, *depends_on]
+        signature = _signature(paths)
+        cache_key = ('load', path, key)
+        with self.lock:
+            entry = self.entries.get(cache_key)
+            if entry and entry['signature'] == signature:
+                self.entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry['value']
+            self.misses += 1
+        value = loader()
+        self._store(cache_key, {'value': value, 'signature': signature, 'nbytes': _nbytes(value, path)})
+        return value
+
+    def load_csv(self, path, **read_kwargs):
+        return self.load(path, lambda: pd.read_csv(path, **read_kwargs), key=tuple(sorted(read_kwargs.items())))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.total_bytes, 'budget_bytes': self.budget_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+cache = DataCache()
+load = cache.load
+load_csv = cache.load_csv
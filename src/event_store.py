@@ -0,0 +1,238 @@
+import argparse
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+RESULTS_PATH = os.path.join(PROJECT_ROOT, "results")
+DB_PATH = os.path.join(RESULTS_PATH, "events.db")
+
+# Complaint counters are kept per 5-minute bucket of the complaint timestamp.
+BUCKET_SECONDS = 300
+# Timestamps are normalized to TIMESTAMP_FORMAT on insert; COALESCE keeps a timestamp SQLite cannot
+# read (from a store written before that) out of every time window instead of failing the insert.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+BUCKET_SQL = (f"COALESCE(datetime(CAST(strftime('%%s', %(ts)s) AS INTEGER) / {BUCKET_SECONDS} * {BUCKET_SECONDS}, "
+              "'unixepoch'), '')")
+
+# Column order of each event table, matching the CSV files they replace.
+TABLES = {
+    'audit_log': ['timestamp', 'action'],
+    'feedback': ['timestamp', 'feedback'],
+    'complaints': ['timestamp', 'category', 'description', 'department'],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    action TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit_log_timestamp ON audit_log (timestamp);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    feedback TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS feedback_timestamp ON feedback (timestamp);
+
+CREATE TABLE IF NOT EXISTS complaints (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT,
+    department TEXT
+);
+CREATE INDEX IF NOT EXISTS complaints_timestamp ON complaints (timestamp);
+CREATE INDEX IF NOT EXISTS complaints_category ON complaints (category, timestamp);
+CREATE INDEX IF NOT EXISTS complaints_department ON complaints (department, timestamp);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Running complaint counters, maintained in O(1) per insert by the trigger below.
+CREATE TABLE IF NOT EXISTS complaint_counts (
+    category TEXT NOT NULL,
+    department TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (category, department, bucket)
+);
+CREATE INDEX IF NOT EXISTS complaint_counts_bucket ON complaint_counts (bucket);
+
+CREATE TABLE IF NOT EXISTS complaint_totals (
+    category TEXT NOT NULL,
+    department TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (category, department)
+);
+
+DROP TRIGGER IF EXISTS complaints_counters;
+CREATE TRIGGER IF NOT EXISTS complaints_counters_v2 AFTER INSERT ON complaints
+BEGIN
+    INSERT INTO complaint_counts (category, department, bucket, n)
+    VALUES (NEW.category, COALESCE(NEW.department, ''), %(bucket)s, 1)
+    ON CONFLICT (category, department, bucket) DO UPDATE SET n = n + 1;
+    INSERT INTO complaint_totals (category, department, n)
+    VALUES (NEW.category, COALESCE(NEW.department, ''), 1)
+    ON CONFLICT (category, department) DO UPDATE SET n = n + 1;
+END;
+""" % {'bucket': BUCKET_SQL % {'ts': 'NEW.timestamp'}}
+
+
+def connect(path=DB_PATH):
+    """Open the store in WAL mode, so readers never block the (serialized) writers."""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    if not conn.execute("SELECT 1 FROM meta WHERE key = 'complaint_counters'").fetchone():
+        rebuild_counters(conn)
+    return conn
+
+
+def rebuild_counters(conn):
+    """Recompute the complaint counters from the complaints table (for stores created before them)."""
+    bucket = BUCKET_SQL % {'ts': 'timestamp'}
+    with conn:
+        conn.execute("DELETE FROM complaint_counts")
+        conn.execute("DELETE FROM complaint_totals")
+        conn.execute(f"""INSERT INTO complaint_counts (category, department, bucket, n)
+                         SELECT category, COALESCE(department, ''), {bucket}, COUNT(*) FROM complaints
+                         GROUP BY 1, 2, 3""")
+        conn.execute("""INSERT INTO complaint_totals (category, department, n)
+                        SELECT category, COALESCE(department, ''), COUNT(*) FROM complaints GROUP BY 1, 2""")
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('complaint_counters', ?)", (now(),))
+
+
+def now():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def parse_timestamp(value):
+    """`value` (a string or datetime) in TIMESTAMP_FORMAT, or None if pandas cannot parse it."""
+    parsed = pd.to_datetime(value, errors='coerce', format='mixed')
+    return None if pd.isna(parsed) else parsed.strftime(TIMESTAMP_FORMAT)
+
+
+def _check_columns(table, columns):
+    if table not in TABLES:
+        raise ValueError(f"Unknown event table: {table}")
+    unknown = set(columns) - set(TABLES[table]) - {'id'}
+    if unknown:
+        raise ValueError(f"Unknown columns for {table}: {sorted(unknown)}")
+
+
+def insert(table, rows, path=DB_PATH):
+    """Insert a batch of rows (dicts or tuples in TABLES order) in a single transaction.
+
+    Timestamps are normalized to TIMESTAMP_FORMAT; one pandas cannot parse raises ValueError.
+    """
+    _check_columns(table, [])
+    columns = TABLES[table]
+    values = []
+    for row in rows:
+        row = [row[c] for c in columns] if isinstance(row, dict) else list(row)
+        timestamp = parse_timestamp(row[0])
+        if timestamp is None:
+            raise ValueError(f"Unreadable {table} timestamp: {row[0]!r}")
+        values.append((timestamp, *row[1:]))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    with closing(connect(path)) as conn, conn:
+        conn.executemany(sql, values)
+    return len(values)
+
+
+def log_action(action, timestamp=None, path=DB_PATH):
+    return insert('audit_log', [(timestamp or now(), action)], path)
+
+
+def add_feedback(feedback, timestamp=None, path=DB_PATH):
+    return insert('feedback', [(timestamp or now(), feedback)], path)
+
+
+def add_complaint(category, description, department, timestamp=None, path=DB_PATH):
+    return insert('complaints', [(timestamp or now(), category, description, department)], path)
+
+
+def _where(table, filters):
+    _check_columns(table, filters)
+    clauses = [f"{column} = ?" for column in filters]
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), list(filters.values())
+
+
+def count(table, path=DB_PATH, **filters):
+    where, params = _where(table, filters)
+    with closing(connect(path)) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+
+def query(table, limit=50, offset=0, path=DB_PATH, **filters):
+    """One page of events, newest first, optionally filtered on exact column values."""
+    where, params = _where(table, filters)
+    columns = ', '.join(TABLES[table])
+    sql = f"SELECT {columns} FROM {table}{where} ORDER BY timestamp DESC, id DESC"
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def distinct(table, column, path=DB_PATH):
+    _check_columns(table, [column])
+    with closing(connect(path)) as conn:
+        return [row[0] for row in conn.execute(f"SELECT DISTINCT {column} FROM {table} ORDER BY {column}")]
+
+
+def migrate_csvs(results_dir=RESULTS_PATH, path=DB_PATH):
+    """One-time import of the legacy audit_log/feedback/complaints CSVs; safe to call repeatedly."""
+    migrated = {}
+    with closing(connect(path)) as conn:
+        for table, columns in TABLES.items():
+            csv_path = os.path.join(results_dir, f"{table}.csv")
+            key = f"migrated:{table}.csv"
+            if not os.path.exists(csv_path) or conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                continue
+            try:
+                data = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+            except pd.errors.EmptyDataError:
+                data = pd.DataFrame(columns=columns)
+            except pd.errors.ParserError as e:
+                print(f"Skipping {csv_path}: {e}")
+                continue
+            if list(data.columns) != columns:
+                print(f"Skipping {csv_path}: expected columns {columns}, found {list(data.columns)[:len(columns)]}")
+                continue
+            timestamps = data['timestamp'].map(parse_timestamp)
+            bad = timestamps.isna()
+            if bad.any():
+                print(f"Skipping {bad.sum()} rows of {csv_path} with unreadable timestamps: "
+                      f"{', '.join(map(repr, data.loc[bad, 'timestamp'].head(3)))}")
+                data = data[~bad].assign(timestamp=timestamps[~bad])
+            else:
+                data = data.assign(timestamp=timestamps)
+            with conn:
+                conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                                 data[columns].itertuples(index=False, name=None))
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, now()))
+            migrated[table] = len(data)
+            print(f"Migrated {len(data)} rows from {csv_path} into {table}")
+    return migrated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Audit, feedback and complaint event store")
+    parser.add_argument('--migrate', action='store_true', help="Import the legacy CSV files in results/")
+    args = parser.parse_args()
+    if args.migrate:
+        migrate_csvs()
+    for table in TABLES:
+        print(f"{table}: {count(table)} events")
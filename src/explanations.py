@@ -0,0 +1,89 @@
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pandas as pd
+
+from risk_table import CODE_RANGES, FEATURES, all_cells
+
+
+def cell_index(X):
+    """Position of each row's demographic cell in all_cells() order."""
+    codes = [np.asarray(X[f], dtype=np.int64) - CODE_RANGES[f][0] for f in FEATURES]
+    shape = tuple(hi - lo + 1 for lo, hi in (CODE_RANGES[f] for f in FEATURES))
+    return np.ravel_multi_index(codes, shape)
+
+
+def background_weights(X, counts=None):
+    """Empirical distribution of the background rows (or cells with row counts) over demographic cells."""
+    counts = np.bincount(cell_index(X), weights=counts, minlength=len(all_cells()))
+    return counts / counts.sum()
+
+
+def exact_shapley(predict, background):
+    """Exact interventional Shapley values for every demographic cell.
+
+    With three features there are only 2^3 coalitions, and every value function
+    E[f(x_S, B_notS)] is a weighted sum over the (at most 54) background cells, so
+    the attributions are exact rather than sampled. `predict` maps a FEATURES frame
+    to one output per row; `background` is a weight per cell from background_weights.
+    Returns (base_value, phi) with phi shaped (cells, features).
+    """
+    cells = all_cells()
+    support = np.flatnonzero(background)
+    weights = background[support]
+    n, m, k = len(cells), len(FEATURES), len(support)
+    coalitions = [s for size in range(m + 1) for s in combinations(range(m), size)]
+
+    # One batched predict over every (cell, coalition, background cell) hybrid point.
+    hybrid = {}
+    for j, f in enumerate(FEATURES):
+        x = np.repeat(cells[f].to_numpy(), k)
+        b = np.tile(cells[f].to_numpy()[support], n)
+        hybrid[f] = np.concatenate([x if j in s else b for s in coalitions])
+    outputs = np.asarray(predict(pd.DataFrame(hybrid)[FEATURES])).reshape(len(coalitions), n, k)
+    value = dict(zip(coalitions, outputs @ weights))
+
+    phi = np.zeros((n, m))
+    for i in range(m):
+        for s in coalitions:
+            if i in s:
+                continue
+            weight = factorial(len(s)) * factorial(m - len(s) - 1) / factorial(m)
+            phi[:, i] += weight * (value[tuple(sorted(s + (i,)))] - value[s])
+    return float(value[()][0]), phi
+
+
+def cell_table(name, predict, background, counts):
+    """Per-cell attribution table for one model; counts are rows per cell to explain."""
+    base_value, phi = exact_shapley(predict, background)
+    table = all_cells()
+    table.insert(0, 'model', name)
+    table['count'] = counts
+    table['base_value'] = base_value
+    table['prediction'] = base_value + phi.sum(axis=1)
+    for j, f in enumerate(FEATURES):
+        table[f"shap_{f}"] = phi[:, j]
+    return table
+
+
+def group_table(cells):
+    """Count-weighted mean and mean |SHAP| of each feature's attribution, per demographic group."""
+    rows = []
+    for model, model_cells in cells.groupby('model', sort=False):
+        observed = model_cells[model_cells['count'] > 0]
+        for f in FEATURES:
+            for group, members in observed.groupby(f):
+                weights = members['count'].to_numpy()
+                for attributed in FEATURES:
+                    phi = members[f"shap_{attributed}"].to_numpy()
+                    rows.append({'model': model, 'sensitive_feature': f, 'group': group,
+                                 'count': int(weights.sum()), 'feature': attributed,
+                                 'mean_shap': np.average(phi, weights=weights),
+                                 'mean_abs_shap': np.average(np.abs(phi), weights=weights)})
+    return pd.DataFrame(rows)
+
+
+def broadcast(cells, X):
+    """Per-row SHAP values, gathered from a single model's cell table."""
+    return cells[[f"shap_{f}" for f in FEATURES]].to_numpy()[cell_index(X)]
@@ -1,31 +1,20 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from fairlearn.metrics import MetricFrame, selection_rate
 import joblib
 
-data = pd.read_csv('../data/preprocessed_data.csv')
-model = joblib.load('../models/model.pkl')
-
-X = data[['GENDER', 'RACE', 'ETHNICITY']]
-y = data['TREATMENT']
+import training
+from fairness_engine import SENSITIVE_FEATURES, group_metrics
 
-sensitive_features_list = ['GENDER', 'RACE', 'ETHNICITY']
-results = []
+model = joblib.load('../models/model.pkl')
 
-for sf in sensitive_features_list:
-    sensitive_features = data[sf]
-    X_train, X_test, y_train, y_test, sensitive_train, sensitive_test = train_test_split(
-        X, y, sensitive_features, test_size=0.2, random_state=42
-    )
-    y_pred = model.predict(X_test)
-    mf = MetricFrame(metrics={'selection_rate': selection_rate},
-                     y_true=y_test,
-                     y_pred=y_pred,
-                     sensitive_features=sensitive_test)
-    mf_df = mf.by_group.reset_index()
-    mf_df['sensitive_feature'] = sf
-    results.append(mf_df)
+# Evaluate on the same held-out count split as training, predicting once per demographic cell.
+cells = training.load_cells()
+_, test_cells = training.split_counts(cells, test_size=0.2, random_state=42)
+counts = test_cells[SENSITIVE_FEATURES].assign(
+    y_true=test_cells[training.LABEL].astype('int8'),
+    y_pred=model.predict(test_cells[SENSITIVE_FEATURES]).astype('int8'),
+    count=test_cells['count'])
+group_table, summary_table = group_metrics(counts)
 
-final_results = pd.concat(results, ignore_index=True)
-final_results.to_csv('../results/fairness_metrics.csv', index=False)
-print("Fairness metrics saved to ../results/fairness_metrics.csv")
\ No newline at end of file
+group_table.to_csv('../results/fairness_metrics.csv', index=False)
+summary_table.to_csv('../results/fairness_summary.csv', index=False)
+print("Fairness metrics saved to ../results/fairness_metrics.csv")
+print("Disparity gaps saved to ../results/fairness_summary.csv")
@@ -0,0 +1,125 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+SENSITIVE_FEATURES = ['GENDER', 'RACE', 'ETHNICITY']
+INTERSECTIONS = [('RACE', 'GENDER'), ('RACE', 'ETHNICITY'), ('GENDER', 'ETHNICITY')]
+# Confusion-matrix cell of a row is 2 * y_true + y_pred.
+TN, FP, FN, TP = range(4)
+
+METRIC_COLUMNS = ['selection_rate', 'tpr', 'fpr']
+GROUP_COLUMNS = ['sensitive_feature', 'group', 'count'] + [
+    f"{m}{suffix}" for m in METRIC_COLUMNS for suffix in ('', '_low', '_high')]
+SUMMARY_COLUMNS = ['sensitive_feature'] + [
+    f"{m}{suffix}" for m in ('demographic_parity_difference', 'equalized_odds_difference')
+    for suffix in ('', '_low', '_high')]
+
+
+def cell_counts(sensitive, y_true, y_pred):
+    """Count rows per (demographic cell, y_true, y_pred).
+
+    These counts are sufficient statistics for every metric below, and counts from
+    disjoint row sets merge by summation.
+    """
+    frame = sensitive.reset_index(drop=True).copy()
+    frame['y_true'] = np.asarray(y_true, dtype=np.int8)
+    frame['y_pred'] = np.asarray(y_pred, dtype=np.int8)
+    return frame.value_counts(sort=False).rename('count').reset_index()
+
+
+def merge_counts(counts):
+    """Combine cell_counts tables computed over disjoint data."""
+    counts = pd.concat(counts, ignore_index=True)
+    keys = [c for c in counts.columns if c != 'count']
+    return counts.groupby(keys, as_index=False, sort=False)['count'].sum()
+
+
+def _groupings(features, intersections):
+    return [(f,) for f in features] + [tuple(i) for i in intersections]
+
+
+def _confusion_by_group(cells, columns, counts):
+    """Per-group TN/FP/FN/TP totals for one grouping; counts may be (K,) or (B, K)."""
+    labels = cells[list(columns)].astype(str).agg('|'.join, axis=1)
+    groups, group_idx = np.unique(labels.to_numpy(), return_inverse=True)
+    conf_idx = 2 * cells['y_true'].to_numpy() + cells['y_pred'].to_numpy()
+    indicator = np.zeros((len(cells), len(groups) * 4))
+    indicator[np.arange(len(cells)), group_idx * 4 + conf_idx] = 1
+    return groups, (counts @ indicator).reshape(counts.shape[:-1] + (len(groups), 4))
+
+
+def _rates(conf):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = conf.sum(axis=-1)
+        selection_rate = (conf[..., FP] + conf[..., TP]) / n
+        tpr = conf[..., TP] / (conf[..., TP] + conf[..., FN])
+        fpr = conf[..., FP] / (conf[..., FP] + conf[..., TN])
+    return n, {'selection_rate': selection_rate, 'tpr': tpr, 'fpr': fpr}
+
+
+def _gap(values):
+    """max - min across groups (last axis), ignoring groups where the rate is undefined."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmax(values, axis=-1) - np.nanmin(values, axis=-1)
+
+
+def _interval(samples, alpha):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return (np.nanpercentile(samples, 100 * alpha / 2, axis=0),
+                np.nanpercentile(samples, 100 * (1 - alpha / 2), axis=0))
+
+
+@instrumentation.timed('fairness_metrics')
+def group_metrics(cells, features=SENSITIVE_FEATURES, intersections=INTERSECTIONS, n_boot=1000, alpha=0.05,
+                  random_state=42):
+    """Selection rate, TPR and FPR per group, plus parity gaps, for every grouping in one pass.
+
+    Bootstrap intervals resample the cell counts with one batched multinomial draw, which is
+    equivalent to resampling rows, so their cost depends on the number of cells, not rows.
+    Returns (groups, summary) tidy DataFrames.
+    """
+    counts = cells['count'].to_numpy(dtype=np.float64)
+    total = int(counts.sum())
+    rng = np.random.default_rng(random_state)
+    boot = rng.multinomial(total, counts / total, size=n_boot).astype(np.float64) if n_boot else None
+
+    group_rows, summary_rows = [], []
+    for columns in _groupings(features, intersections):
+        name = '|'.join(columns)
+        groups, conf = _confusion_by_group(cells, columns, counts)
+        n, rates = _rates(conf)
+        frame = {'sensitive_feature': name, 'group': groups, 'count': n.astype(np.int64)}
+        dpd = _gap(rates['selection_rate'])
+        eod = np.fmax(_gap(rates['tpr']), _gap(rates['fpr']))
+        summary = {'sensitive_feature': name, 'demographic_parity_difference': dpd,
+                   'equalized_odds_difference': eod}
+        if boot is not None:
+            _, boot_conf = _confusion_by_group(cells, columns, boot)
+            _, boot_rates = _rates(boot_conf)
+            for metric in METRIC_COLUMNS:
+                frame[f"{metric}_low"], frame[f"{metric}_high"] = _interval(boot_rates[metric], alpha)
+            boot_gaps = {'demographic_parity_difference': _gap(boot_rates['selection_rate']),
+                         'equalized_odds_difference': np.fmax(_gap(boot_rates['tpr']), _gap(boot_rates['fpr']))}
+            for metric, samples in boot_gaps.items():
+                summary[f"{metric}_low"], summary[f"{metric}_high"] = _interval(samples, alpha)
+        frame.update(rates)
+        group_rows.append(pd.DataFrame(frame))
+        summary_rows.append(summary)
+
+    group_table = pd.concat(group_rows, ignore_index=True).reindex(columns=GROUP_COLUMNS)
+    summary_table = pd.DataFrame(summary_rows).reindex(columns=SUMMARY_COLUMNS)
+    return group_table.astype({'group': 'string'}), summary_table
+
+
+def read_metrics(path):
+    """Load a fairness_metrics.csv, converting the older one-column-per-feature layout."""
+    data = pd.read_csv(path, dtype={'group': 'string'})
+    if 'group' not in data.columns:
+        data['group'] = [str(int(row[row['sensitive_feature']])) for _, row in data.iterrows()]
+        data = data[['sensitive_feature', 'group', 'selection_rate']].astype({'group': 'string'})
+    return data
@@ -0,0 +1,74 @@
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+STORE_PATH = os.path.join(PROJECT_ROOT, "data", "preprocessed_data.parquet")
+CSV_PATH = os.path.join(PROJECT_ROOT, "data", "preprocessed_data.csv")
+
+# Typed, columnar layout of preprocessed_data: small-int demographics and a bool label.
+SCHEMA = pa.schema([
+    ('Id', pa.dictionary(pa.int32(), pa.string())),
+    ('BIRTHDATE', pa.dictionary(pa.int32(), pa.string())),
+    ('GENDER', pa.int8()),
+    ('RACE', pa.int8()),
+    ('ETHNICITY', pa.int8()),
+    ('ENCOUNTERCLASS', pa.dictionary(pa.int32(), pa.string())),
+    ('TREATMENT', pa.bool_()),
+])
+CSV_DTYPES = {'GENDER': 'int8', 'RACE': 'int8', 'ETHNICITY': 'int8', 'TREATMENT': 'bool'}
+COMPRESSION = 'zstd'
+
+
+@contextmanager
+def open_writer(path=STORE_PATH):
+    """Open a Parquet writer on <path>.tmp; every write_chunk call becomes one row group.
+
+    The store is moved onto `path` only when the block completes, so a failure mid-stream
+    leaves the previous store in place instead of an empty or partial one.
+    """
+    tmp_path = path + '.tmp'
+    writer = pq.ParquetWriter(tmp_path, SCHEMA, compression=COMPRESSION)
+    completed = False
+    try:
+        yield writer
+        completed = True
+    finally:
+        writer.close()
+        if completed:
+            os.replace(tmp_path, path)
+        else:
+            os.remove(tmp_path)
+
+
+def write_chunk(writer, data):
+    table = pa.Table.from_pandas(data, schema=SCHEMA, preserve_index=False)
+    writer.write_table(table, row_group_size=len(data) or None)
+
+
+def read_features(columns=None, path=STORE_PATH):
+    """Read only the requested columns, memory-mapped; falls back to the CSV export."""
+    if os.path.exists(path):
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    if os.path.exists(CSV_PATH):
+        dtypes = {col: dtype for col, dtype in CSV_DTYPES.items() if columns is None or col in columns}
+        return pd.read_csv(CSV_PATH, usecols=columns, dtype=dtypes)
+    raise FileNotFoundError(f"No feature store at {path}. Please run preprocess_data.py first.")
+
+
+def iter_features(columns=None, path=STORE_PATH, batch_size=1000000):
+    """Yield the requested columns in batches, so callers can reduce the store in bounded memory."""
+    if os.path.exists(path):
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+        return
+    if os.path.exists(CSV_PATH):
+        dtypes = {col: dtype for col, dtype in CSV_DTYPES.items() if columns is None or col in columns}
+        yield from pd.read_csv(CSV_PATH, usecols=columns, dtype=dtypes, chunksize=batch_size)
+        return
+    raise FileNotFoundError(f"No feature store at {path}. Please run preprocess_data.py first.")
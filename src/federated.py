@@ -0,0 +1,155 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+
+import joblib
+import pandas as pd
+
+import cube
+import training
+from fairness_engine import GROUP_COLUMNS, SENSITIVE_FEATURES, SUMMARY_COLUMNS, group_metrics, merge_counts
+from preprocess_data import ENCOUNTER_COLUMNS, load_patients, transform_chunk
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+PATIENTS_PATH = os.path.join(PROJECT_ROOT, "data", "synthea", "patients.csv")
+ENCOUNTERS_PATH = os.path.join(PROJECT_ROOT, "data", "synthea", "encounters.csv")
+SITES_DIR = os.path.join(PROJECT_ROOT, "data", "sites")
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "model.pkl")
+RESULTS_PATH = os.path.join(PROJECT_ROOT, "results")
+METRICS_PATH = os.path.join(RESULTS_PATH, "federated_metrics.csv")
+SUMMARY_PATH = os.path.join(RESULTS_PATH, "federated_summary.csv")
+
+CHUNKSIZE = 500000
+# Each site is a directory holding its own Synthea-format files.
+SITE_FILES = ('patients.csv', 'encounters.csv')
+COUNT_KEYS = SENSITIVE_FEATURES + ['y_true', 'y_pred']
+
+
+def site_of(county, n_sites):
+    """Site index per patient: a stable hash of the county, the same in every process."""
+    return pd.util.hash_pandas_object(county.astype(str), index=False).to_numpy() % n_sites
+
+
+def split(out_dir=SITES_DIR, n_sites=4, patients_path=PATIENTS_PATH, encounters_path=ENCOUNTERS_PATH,
+          chunksize=CHUNKSIZE):
+    """Partition local Synthea data into n_sites site directories by patient county, standing in
+    for hospitals that each hold their own patients and encounters. Returns the site directories."""
+    patients = pd.read_csv(patients_path, dtype=str)
+    county, _ = cube.patient_dimensions(patients)
+    site = site_of(county, n_sites)
+    sites = [os.path.join(out_dir, f"site_{i:02d}") for i in range(n_sites)]
+    for i, site_dir in enumerate(sites):
+        os.makedirs(site_dir, exist_ok=True)
+        patients[site == i].to_csv(os.path.join(site_dir, 'patients.csv'), index=False)
+
+    site_by_patient = pd.Series(site, index=patients['Id'])
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(os.path.join(site_dir, 'encounters.csv'), 'w', newline=''))
+                 for site_dir in sites]
+        header = True
+        for chunk in pd.read_csv(encounters_path, dtype=str, chunksize=chunksize):
+            # Encounters of unknown patients would be dropped by every site's join anyway.
+            chunk_site = chunk['PATIENT'].map(site_by_patient)
+            for i, f in enumerate(files):
+                chunk[chunk_site == i].to_csv(f, header=header, index=False)
+            header = False
+    return sites
+
+
+def site_counts(site, site_dir, model_path=MODEL_PATH, chunksize=CHUNKSIZE):
+    """Run at a site: rows per (demographic cell, y_true, y_pred) over its own encounters.
+
+    These counts are all that leaves the site; they are the sufficient statistics for
+    fairness_engine.group_metrics and merge exactly by summation.
+    """
+    started = time.perf_counter()
+    model = joblib.load(model_path)
+    patients = load_patients(os.path.join(site_dir, 'patients.csv'))
+    chunks = pd.read_csv(os.path.join(site_dir, 'encounters.csv'), usecols=ENCOUNTER_COLUMNS,
+                         dtype={'ENCOUNTERCLASS': 'category'}, chunksize=chunksize)
+    cells = training.merge_cells([training.aggregate(transform_chunk(chunk, patients)) for chunk in chunks])
+    # The shared model is shipped to the data: one prediction per demographic cell.
+    predictions = model.predict(cells[SENSITIVE_FEATURES]) if len(cells) else []
+    counts = cells[SENSITIVE_FEATURES].assign(
+        y_true=cells[training.LABEL].astype('int8'),
+        y_pred=pd.Series(predictions, index=cells.index, dtype='int8'),
+        count=cells['count'])
+    return site, counts, {'rows': int(counts['count'].sum()), 'seconds': time.perf_counter() - started}
+
+
+def find_sites(sites_dir=SITES_DIR):
+    return {name: os.path.join(sites_dir, name) for name in sorted(os.listdir(sites_dir))
+            if all(os.path.exists(os.path.join(sites_dir, name, f)) for f in SITE_FILES)}
+
+
+def _label(table, site):
+    return table.assign(site=site)[['site'] + list(table.columns)]
+
+
+def run(sites_dir=SITES_DIR, workers=None, model_path=MODEL_PATH, n_boot=1000):
+    """Compute every site's counts in parallel and combine them as they arrive.
+
+    The coordinator keeps one running merged table (its size is the number of demographic cells,
+    not rows) and turns each site's counts into that site's metrics straight away, so both its
+    memory and the combine cost grow linearly with the number of sites.
+    Returns (groups, summary, sites) DataFrames; site 'all' is the global result.
+    """
+    sites = find_sites(sites_dir)
+    if not sites:
+        raise FileNotFoundError(f"No site directories with {' and '.join(SITE_FILES)} in {sites_dir}")
+    total = None
+    group_tables, summary_tables, site_rows = [], [], []
+    with ProcessPoolExecutor(workers or min(len(sites), os.cpu_count())) as pool:
+        futures = [pool.submit(site_counts, name, site_dir, model_path) for name, site_dir in sites.items()]
+        for future in as_completed(futures):
+            site, counts, stats = future.result()
+            total = counts if total is None else merge_counts([total, counts])
+            if stats['rows']:
+                groups, summary = group_metrics(counts, n_boot=n_boot)
+                group_tables.append(_label(groups, site))
+                summary_tables.append(_label(summary, site))
+            site_rows.append(dict(site=site, cells=len(counts), **stats))
+            print(f"{site}: {stats['rows']} encounters in {stats['seconds']:.2f}s")
+
+    if total['count'].sum() == 0:
+        raise ValueError(f"No site in {sites_dir} has encounters that join its patients; nothing to measure")
+    # Sites finish in any order; sorting makes the bootstrap draws independent of it.
+    total = total.sort_values(COUNT_KEYS).reset_index(drop=True)
+    groups, summary = group_metrics(total, n_boot=n_boot)
+    groups = pd.concat([_label(groups, 'all')] + sorted(group_tables, key=lambda t: t['site'].iat[0]),
+                       ignore_index=True)
+    summary = pd.concat([_label(summary, 'all')] + sorted(summary_tables, key=lambda t: t['site'].iat[0]),
+                        ignore_index=True)
+    return (groups[['site'] + GROUP_COLUMNS], summary[['site'] + SUMMARY_COLUMNS],
+            pd.DataFrame(site_rows).sort_values('site').reset_index(drop=True))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fairness metrics across hospital sites, sharing only counts")
+    commands = parser.add_subparsers(dest='command', required=True)
+    split_parser = commands.add_parser('split', help="Partition the local Synthea data into site directories")
+    split_parser.add_argument('sites_dir', nargs='?', default=SITES_DIR)
+    split_parser.add_argument('--sites', type=int, default=4)
+    run_parser = commands.add_parser('run', help="Compute per-site counts in parallel and merge them")
+    run_parser.add_argument('sites_dir', nargs='?', default=SITES_DIR)
+    run_parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'split':
+        for site_dir in split(args.sites_dir, args.sites):
+            print(f"Site data saved to {site_dir}")
+    else:
+        started = time.perf_counter()
+        groups, summary, sites = run(args.sites_dir, args.workers)
+        groups.to_csv(METRICS_PATH, index=False)
+        summary.to_csv(SUMMARY_PATH, index=False)
+        print(sites.to_string(index=False))
+        print(summary[summary['sensitive_feature'].isin(SENSITIVE_FEATURES)][
+            ['site', 'sensitive_feature', 'demographic_parity_difference', 'equalized_odds_difference']
+        ].to_string(index=False))
+        print(f"{len(sites)} sites merged in {time.perf_counter() - started:.1f}s")
+        print(f"Federated metrics saved to {METRICS_PATH}")
+        print(f"Disparity gaps saved to {SUMMARY_PATH}")
@@ -0,0 +1,256 @@
+import atexit
+import json
+import os
+import re
+import resource
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+# Opt-in, for scripts: HD_METRICS_DIR gets a JSON dump of the metrics and HD_PROFILE_DIR a
+# flamegraph-compatible folded-stack profile, one file per script run. Relative paths are resolved
+# at import, before pipeline.py's workers chdir into src/.
+METRICS_DIR = os.environ.get('HD_METRICS_DIR') and os.path.abspath(os.environ['HD_METRICS_DIR'])
+PROFILE_DIR = os.environ.get('HD_PROFILE_DIR') and os.path.abspath(os.environ['HD_PROFILE_DIR'])
+PROFILE_INTERVAL = float(os.environ.get('HD_PROFILE_INTERVAL', 0.005))
+PREFIX = 'hd_'
+RESERVOIR = 1024
+
+
+class Timer:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.recent = deque(maxlen=RESERVOIR)
+
+    def observe(self, seconds, rows=0):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        self.recent.append(seconds)
+
+
+class Registry:
+    """Process-wide timers and counters, keyed by name and labels."""
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, name, seconds, rows=0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.timers.setdefault(key, Timer()).observe(seconds, rows)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """Plain-dict view of every metric, with p50/p99 over each timer's recent observations."""
+        with self.lock:
+            timers = [(name, dict(labels), t.count, t.total, t.max, t.rows, list(t.recent))
+                      for (name, labels), t in self.timers.items()]
+            counters = [(name, dict(labels), value) for (name, labels), value in self.counters.items()]
+        rows = []
+        for name, labels, count, total, longest, n_rows, recent in timers:
+            p50, p99 = np.percentile(recent, [50, 99]) if recent else (0.0, 0.0)
+            rows.append({'name': name, 'labels': labels, 'count': count, 'total_seconds': total,
+                         'mean_ms': total / count * 1000 if count else 0.0, 'p50_ms': p50 * 1000,
+                         'p99_ms': p99 * 1000, 'max_ms': longest * 1000, 'rows': n_rows,
+                         'rows_per_s': n_rows / total if total else 0.0})
+        return {'started': self.started, 'timers': rows,
+                'counters': [{'name': name, 'labels': labels, 'value': value} for name, labels, value in counters]}
+
+
+registry = Registry()
+count = registry.count
+reset = registry.reset
+snapshot = registry.snapshot
+
+
+@contextmanager
+def timer(name, rows=0, **labels):
+    """Time a block; `rows` (items processed) also feeds the rows-per-second figure."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, time.perf_counter() - started, rows, **labels)
+
+
+def timed(name, **labels):
+    """Decorator form of timer()."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def peak_rss_mb():
+    """This process's own peak RSS. ru_maxrss carries over the parent's peak through the fork
+    that starts a spawned worker, so prefer the kernel's per-address-space high-water mark."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def to_json(snap=None):
+    return json.dumps(snap or snapshot(), indent=2)
+
+
+def _labels(labels, **extra):
+    items = dict(labels, **extra)
+    if not items:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in items.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(items, escaped)) + '}'
+
+
+def _metric_name(name):
+    return PREFIX + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def to_prometheus(snap=None):
+    """Prometheus text exposition: a summary per timer, a rows counter per timer that counts rows,
+    and a counter per counter."""
+    snap = snap or snapshot()
+    lines = []
+    for name in sorted({t['name'] for t in snap['timers']}):
+        metric = _metric_name(name) + '_seconds'
+        lines += [f"# TYPE {metric} summary"]
+        for t in (t for t in snap['timers'] if t['name'] == name):
+            lines += [f"{metric}{_labels(t['labels'], quantile='0.5')} {t['p50_ms'] / 1000:.6g}",
+                      f"{metric}{_labels(t['labels'], quantile='0.99')} {t['p99_ms'] / 1000:.6g}",
+                      f"{metric}_sum{_labels(t['labels'])} {t['total_seconds']:.6g}",
+                      f"{metric}_count{_labels(t['labels'])} {t['count']}"]
+    # Rows processed per timer, each its own counter family after the summaries.
+    for name in sorted({t['name'] for t in snap['timers'] if t['rows']}):
+        metric = _metric_name(name) + '_rows_total'
+        lines.append(f"# TYPE {metric} counter")
+        lines += [f"{metric}{_labels(t['labels'])} {t['rows']}" for t in snap['timers'] if t['name'] == name and t['rows']]
+    for name in sorted({c['name'] for c in snap['counters']}):
+        metric = _metric_name(name) + '_total'
+        lines.append(f"# TYPE {metric} counter")
+        lines += [f"{metric}{_labels(c['labels'])} {c['value']}" for c in snap['counters'] if c['name'] == name]
+    return '\n'.join(lines) + '\n'
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack every `interval` seconds into folded stacks
+    ("outer;inner count" lines), the input format of flamegraph.pl and speedscope."""
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name='hd-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def folded(self):
+        return ''.join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def top_frames(self, limit=20):
+        """Frames by self samples (innermost frame of each stack)."""
+        own = Counter()
+        for stack, n in self.stacks.items():
+            own[stack.rsplit(';', 1)[-1]] += n
+        return own.most_common(limit)
+
+    def dump(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.folded())
+        return path
+
+
+@contextmanager
+def profile(path=None, interval=PROFILE_INTERVAL):
+    """Profile the calling thread for the duration of the block, optionally dumping to `path`."""
+    profiler = SamplingProfiler(interval=interval).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        if path:
+            profiler.dump(path)
+
+
+def _script_name():
+    return os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+
+
+_script_profiler = None
+
+
+def flush():
+    """Write the opt-in metrics and profile files for this script run; returns the paths written."""
+    global _script_profiler
+    stem = f"{_script_name()}-{os.getpid()}"
+    written = []
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{stem}.json")
+        with open(path, 'w') as f:
+            f.write(to_json())
+        written.append(path)
+    if _script_profiler is not None:
+        profiler, _script_profiler = _script_profiler.stop(), None
+        written.append(profiler.dump(os.path.join(PROFILE_DIR, f"{stem}.folded")))
+    return written
+
+
+if PROFILE_DIR:
+    _script_profiler = SamplingProfiler(thread_id=threading.main_thread().ident).start()
+if METRICS_DIR or PROFILE_DIR:
+    atexit.register(flush)
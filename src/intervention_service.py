@@ -0,0 +1,191 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import instrumentation
+from fairness_engine import read_metrics
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+METRICS_PATH = os.path.join(PROJECT_ROOT, "results", "fairness_metrics.csv")
+KB_PATH = os.path.join(PROJECT_ROOT, "data", "interventions_kb.csv")
+CACHE_PATH = os.path.join(PROJECT_ROOT, "results", "intervention_cache.jsonl")
+
+MODEL_NAME = 'gpt2'
+GENERATION_KWARGS = {'max_length': 150, 'num_return_sequences': 1}
+BATCH_SIZE = 8
+HOST, PORT = '127.0.0.1', 8765
+SERVICE_URL = f"http://{HOST}:{PORT}"
+
+GROUP_LABELS = {
+    'GENDER': {0: 'Male', 1: 'Female', 2: 'Unknown'},
+    'RACE': {0: 'White', 1: 'Black', 2: 'Asian', 3: 'Native', 4: 'Other', -1: 'Unknown'},
+    'ETHNICITY': {0: 'Non-Hispanic', 1: 'Hispanic', -1: 'Unknown'},
+}
+
+
+def group_label(feature, group):
+    """'0|1' for RACE|GENDER -> 'White/Female'."""
+    parts = zip(feature.split('|'), str(group).split('|'))
+    return '/'.join(GROUP_LABELS.get(f, {}).get(int(float(g)), g) for f, g in parts)
+
+
+def describe_disparity(feature, metrics):
+    data = metrics[metrics['sensitive_feature'] == feature]
+    if data.empty:
+        return f"No {feature.lower()} disparity data available."
+    low = data.loc[data['selection_rate'].idxmin()]
+    high = data.loc[data['selection_rate'].idxmax()]
+    name = feature.replace('|', ' and ').title()
+    return (f"{name} group {group_label(feature, low['group'])} has a selection rate of {low['selection_rate']:.2f}, "
+            f"while {name.lower()} group {group_label(feature, high['group'])} has {high['selection_rate']:.2f}, "
+            f"a disparity of {high['selection_rate'] - low['selection_rate']:.2f}.")
+
+
+def build_prompt(description, interventions):
+    if len(interventions) > 0:
+        return (f"Based on the disparity: {description}, and considering these interventions: "
+                f"{', '.join(interventions)}, suggest a tailored intervention.")
+    return f"Based on the disparity: {description}, suggest an intervention."
+
+
+def build_prompts(metrics, kb):
+    """One prompt per sensitive feature in the metrics and per knowledge-base disparity type."""
+    prompts = {}
+    for feature in metrics['sensitive_feature'].unique():
+        types = [f"{f.lower()}_disparity" for f in feature.split('|')]
+        interventions = kb[kb['disparity_type'].isin(types)]['suggested_intervention'].values
+        prompts[feature] = build_prompt(describe_disparity(feature, metrics), interventions)
+    covered = {f"{f.lower()}_disparity" for f in metrics['sensitive_feature'].unique()}
+    for disparity_type, rows in kb.groupby('disparity_type', sort=False):
+        if disparity_type not in covered:
+            description = f"A {disparity_type.replace('_', ' ')} has been reported"
+            prompts[disparity_type] = build_prompt(description, rows['suggested_intervention'].values)
+    return prompts
+
+
+def load_prompts(metrics_path=METRICS_PATH, kb_path=KB_PATH):
+    return build_prompts(read_metrics(metrics_path), pd.read_csv(kb_path))
+
+
+class InterventionGenerator:
+    """GPT-2 loaded once, with batched generation and a persistent cache keyed by prompt and model version."""
+
+    def __init__(self, model_name=MODEL_NAME, cache_path=CACHE_PATH):
+        from transformers import pipeline
+
+        self.generator = pipeline('text-generation', model=model_name)
+        # GPT-2 has no pad token; pad on the left so batched prompts generate from their real end.
+        self.generator.tokenizer.pad_token_id = self.generator.model.config.eos_token_id
+        self.generator.tokenizer.padding_side = 'left'
+        revision = getattr(self.generator.model.config, '_commit_hash', None) or 'local'
+        self.model_version = f"{model_name}@{revision}"
+        self.cache_path = cache_path
+        self.cache = {}
+        self.lock = threading.Lock()
+        if os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.cache[entry['key']] = entry['text']
+
+    def cache_key(self, prompt):
+        payload = json.dumps([self.model_version, GENERATION_KWARGS, prompt], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def generate(self, prompts, refresh=False):
+        """Generate a suggestion per prompt, running only uncached prompts through the model."""
+        keys = [self.cache_key(p) for p in prompts]
+        with self.lock:
+            missing = [(k, p) for k, p in zip(keys, prompts) if refresh or k not in self.cache]
+            missing = list(dict(missing).items())
+            instrumentation.count('intervention_cache_hits', len(keys) - len(missing))
+            if missing:
+                with instrumentation.timer('gpt2_generate', rows=len(missing)):
+                    outputs = self.generator([p for _, p in missing], batch_size=BATCH_SIZE, **GENERATION_KWARGS)
+                with open(self.cache_path, 'a', encoding='utf-8') as f:
+                    for (key, _), output in zip(missing, outputs):
+                        self.cache[key] = output[0]['generated_text']
+                        f.write(json.dumps({'key': key, 'model_version': self.model_version,
+                                            'text': self.cache[key]}) + '\n')
+            return [self.cache[k] for k in keys]
+
+
+def make_handler(generator):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/health':
+                self._send(200, {'status': 'ok', 'model_version': generator.model_version})
+            elif url.path == '/suggestions':
+                query = parse_qs(url.query)
+                prompts = load_prompts()
+                wanted = query.get('feature') or list(prompts)
+                unknown = [f for f in wanted if f not in prompts]
+                if unknown:
+                    self._send(404, {'error': f"No prompt for {', '.join(unknown)}"})
+                    return
+                texts = generator.generate([prompts[f] for f in wanted], refresh='refresh' in query)
+                self._send(200, {'model_version': generator.model_version, 'suggestions': dict(zip(wanted, texts))})
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/generate':
+                self._send(404, {'error': 'Not found'})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                prompts = list(body['prompts'])
+            except (ValueError, KeyError, TypeError):
+                self._send(400, {'error': 'Expected a JSON body like {"prompts": [...]}'})
+                return
+            texts = generator.generate(prompts, refresh=bool(body.get('refresh')))
+            self._send(200, {'model_version': generator.model_version, 'suggestions': texts})
+
+    return Handler
+
+
+def request_suggestions(features=None, refresh=False, url=SERVICE_URL, timeout=60):
+    """Ask a running service for suggestions; returns {feature: text}, or None if it is not running
+    or does not answer within `timeout` seconds."""
+    import requests
+
+    params = {'feature': features or []}
+    if refresh:
+        params['refresh'] = 1
+    try:
+        response = requests.get(f"{url}/suggestions", params=params, timeout=timeout)
+    except (requests.ConnectionError, requests.Timeout):
+        return None
+    response.raise_for_status()
+    return response.json()['suggestions']
+
+
+def serve(host=HOST, port=PORT):
+    generator = InterventionGenerator()
+    server = ThreadingHTTPServer((host, port), make_handler(generator))
+    print(f"Intervention service ({generator.model_version}) listening on http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve GPT-2 intervention suggestions from a warm model")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -1,31 +1,13 @@
-import pandas as pd
-from transformers import pipeline
-
-fairness_data = pd.read_csv('../results/fairness_metrics.csv')
-gender_data = fairness_data[fairness_data['sensitive_feature'] == 'GENDER']
-if not gender_data.empty:
-    min_sr = gender_data['selection_rate'].min()
-    max_sr = gender_data['selection_rate'].max()
-    min_group = gender_data.loc[gender_data['selection_rate'].idxmin(), 'GENDER']
-    max_group = gender_data.loc[gender_data['selection_rate'].idxmax(), 'GENDER']
-    gender_labels = {0: 'Male', 1: 'Female', 2: 'Unknown'}
-    min_group_label = gender_labels.get(min_group, str(min_group))
-    max_group_label = gender_labels.get(max_group, str(max_group))
-    disparity_description = f"Gender group {min_group_label} has a selection rate of {min_sr:.2f}, while gender group {max_group_label} has {max_sr:.2f}, a disparity of {max_sr - min_sr:.2f}."
-else:
-    disparity_description = "No gender disparity data available."
-
-kb = pd.read_csv('../data/interventions_kb.csv')
-disparity_type = "gender_disparity"
-relevant_kb = kb[kb['disparity_type'] == disparity_type]['suggested_intervention'].values
-
-generator = pipeline('text-generation', model='gpt2')
-if len(relevant_kb) > 0:
-    prompt = f"Based on the disparity: {disparity_description}, and considering these interventions: {', '.join(relevant_kb)}, suggest a tailored intervention."
-else:
-    prompt = f"Based on the disparity: {disparity_description}, suggest an intervention."
-
-suggestion = generator(prompt, max_length=150, num_return_sequences=1)[0]['generated_text']
-with open('../results/interventions.txt', 'w') as f:
-    f.write(suggestion)
-print("Intervention suggestion saved to ../results/interventions.txt")
\ No newline at end of file
+from intervention_service import InterventionGenerator, load_prompts, request_suggestions
+
+# Prefer a running intervention_service.py, which already has GPT-2 loaded; otherwise load it here once
+suggestions = request_suggestions()
+if suggestions is None:
+    # One prompt per sensitive feature in fairness_metrics.csv and per disparity type in the knowledge base
+    prompts = load_prompts('../results/fairness_metrics.csv', '../data/interventions_kb.csv')
+    generator = InterventionGenerator()
+    suggestions = dict(zip(prompts, generator.generate(list(prompts.values()))))
+
+with open('../results/interventions.txt', 'w', encoding='utf-8') as f:
+    f.write('\n\n'.join(f"[{feature}]\n{text}" for feature, text in suggestions.items()))
+print("Intervention suggestions saved to ../results/interventions.txt")
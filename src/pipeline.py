@@ -0,0 +1,229 @@
+import argparse
+import ast
+import hashlib
+import json
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+import instrumentation
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+MANIFEST_PATH = os.path.join(PROJECT_ROOT, "results", "pipeline_manifest.json")
+
+# Each stage is a script in src/ plus the files it reads and the files it writes; the local
+# modules it runs are found from its imports. Dependencies between stages follow from inputs and outputs.
+STAGES = {
+    'preprocess': {
+        'script': 'preprocess_data.py',
+        'inputs': ['data/synthea/patients.csv', 'data/synthea/encounters.csv'],
+        'outputs': ['data/preprocessed_data.parquet', 'data/demographic_cube.parquet'],
+    },
+    'bias_detection': {
+        'script': 'bias_detection.py',
+        'inputs': ['data/preprocessed_data.parquet'],
+        'outputs': ['models/model.pkl'],
+    },
+    'risk_scoring': {
+        'script': 'risk_scoring.py',
+        'inputs': ['data/preprocessed_data.parquet'],
+        'outputs': ['models/risk_model.pkl', 'models/risk_table.npz'],
+    },
+    'fairness_analysis': {
+        'script': 'fairness_analysis.py',
+        'inputs': ['data/preprocessed_data.parquet', 'models/model.pkl'],
+        'outputs': ['results/fairness_metrics.csv', 'results/fairness_summary.csv'],
+    },
+    'shap_analysis': {
+        'script': 'shap_analysis.py',
+        'inputs': ['data/preprocessed_data.parquet', 'models/model.pkl', 'models/risk_model.pkl'],
+        'outputs': ['results/shap_plot.png', 'results/shap_cells.csv', 'results/shap_groups.csv'],
+    },
+    'interventions': {
+        'script': 'interventions.py',
+        'inputs': ['results/fairness_metrics.csv', 'data/interventions_kb.csv'],
+        'outputs': ['results/interventions.txt'],
+    },
+}
+
+
+def dependencies(stages=STAGES):
+    producers = {out: name for name, stage in stages.items() for out in stage['outputs']}
+    return {name: sorted({producers[i] for i in stage['inputs'] if i in producers} - {name})
+            for name, stage in stages.items()}
+
+
+def imported_names(path):
+    """Every module name imported anywhere in a file, including imports inside functions."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+            names.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return names
+
+
+def local_modules(script, src_dir=BASE_DIR):
+    """The files in src/ that a script imports, directly or through other local modules."""
+    found, pending = set(), [script]
+    while pending:
+        for name in imported_names(os.path.join(src_dir, pending.pop())):
+            base = os.path.join(*name.split('.'))
+            for rel in (base + '.py', os.path.join(base, '__init__.py')):
+                if rel not in found and rel != script and os.path.isfile(os.path.join(src_dir, rel)):
+                    found.add(rel)
+                    pending.append(rel)
+    return sorted(found)
+
+
+class HashCache:
+    """sha256 of file contents, reused while a file's size and mtime are unchanged."""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.entries[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+
+def stage_key(stage, hashes):
+    """Hash of a stage's code and inputs; None if an input is missing."""
+    digest = hashlib.sha256()
+    for rel in [stage['script']] + local_modules(stage['script']):
+        digest.update(f"code:{rel}:{hashes.file_hash(os.path.join(BASE_DIR, rel))}".encode())
+    for rel in stage['inputs']:
+        path = os.path.join(PROJECT_ROOT, rel)
+        if not os.path.exists(path):
+            return None
+        digest.update(f"input:{rel}:{hashes.file_hash(path)}".encode())
+    return digest.hexdigest()
+
+
+def run_stage(script):
+    """Run one stage script in this (fresh) worker process; returns wall time and peak RSS."""
+    os.chdir(BASE_DIR)
+    sys.path.insert(0, BASE_DIR)
+    sys.argv = [script]
+    start = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{script} exited with status {e.code}")
+    finally:
+        # Pool workers exit without running atexit handlers, so write opt-in metrics/profiles here.
+        instrumentation.flush()
+    wall_time = time.perf_counter() - start
+    return wall_time, instrumentation.peak_rss_mb()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'stages': {}, 'hashes': {}}
+
+
+def run(stages=STAGES, jobs=None, force=False, manifest_path=MANIFEST_PATH):
+    previous = load_manifest(manifest_path)
+    hashes = HashCache(previous.get('hashes'))
+    deps = dependencies(stages)
+    results, running = {}, {}
+    started = datetime.now()
+
+    def outputs_exist(stage):
+        return all(os.path.exists(os.path.join(PROJECT_ROOT, out)) for out in stage['outputs'])
+
+    def output_mtimes(stage):
+        paths = [os.path.join(PROJECT_ROOT, out) for out in stage['outputs']]
+        return {path: os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in paths}
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context, max_tasks_per_child=1) as pool:
+        while len(results) < len(stages):
+            for name, stage in stages.items():
+                if name in results or name in running:
+                    continue
+                if any(results.get(d, {}).get('status') in ('failed', 'blocked') for d in deps[name]):
+                    results[name] = {'status': 'blocked'}
+                    print(f"[{name}] blocked by a failed upstream stage")
+                    continue
+                if not all(d in results for d in deps[name]):
+                    continue
+                key = stage_key(stage, hashes)
+                if key is None:
+                    results[name] = {'status': 'failed', 'error': 'missing input'}
+                    print(f"[{name}] missing input, cannot run")
+                    continue
+                last = previous['stages'].get(name, {})
+                if not force and last.get('key') == key and last.get('status') in ('ran', 'cached') \
+                        and outputs_exist(stage):
+                    results[name] = dict(last, status='cached')
+                    print(f"[{name}] unchanged, skipped")
+                    continue
+                print(f"[{name}] running {stage['script']}")
+                running[name] = (pool.submit(run_stage, stage['script']), key, output_mtimes(stage))
+            if not running:
+                continue
+            done, _ = wait([future for future, _, _ in running.values()], return_when=FIRST_COMPLETED)
+            for name in [n for n, (future, _, _) in running.items() if future in done]:
+                future, key, before = running.pop(name)
+                try:
+                    wall_time, peak_rss = future.result()
+                except Exception as e:
+                    results[name] = {'status': 'failed', 'error': repr(e)}
+                    print(f"[{name}] failed: {e!r}")
+                    continue
+                # A script that exits 0 without rewriting its outputs has not produced them for this key.
+                after = output_mtimes(stages[name])
+                stale = [os.path.relpath(path, PROJECT_ROOT) for path, mtime in after.items()
+                         if mtime is None or mtime == before[path]]
+                status = 'failed' if stale else 'ran'
+                results[name] = {'status': status, 'wall_time_s': round(wall_time, 3), 'peak_rss_mb': round(peak_rss, 1)}
+                if stale:
+                    results[name]['error'] = f"outputs not written by this run: {', '.join(stale)}"
+                else:
+                    results[name]['key'] = key
+                print(f"[{name}] {status} in {wall_time:.2f}s, peak RSS {peak_rss:.0f} MB")
+
+    manifest = {
+        'started': started.isoformat(timespec='seconds'),
+        'wall_time_s': round((datetime.now() - started).total_seconds(), 3),
+        'stages': dict(previous['stages'], **results),
+        'hashes': hashes.entries,
+    }
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Run manifest saved to {manifest_path}")
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline, skipping unchanged stages")
+    parser.add_argument('--jobs', type=int, default=None, help="Stages run concurrently (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Rerun every stage even if unchanged")
+    parser.add_argument('--only', nargs='+', choices=list(STAGES), help="Run only these stages")
+    args = parser.parse_args()
+    selected = {name: STAGES[name] for name in (args.only or STAGES)}
+    manifest = run(selected, args.jobs, args.force)
+    # The manifest also keeps stages outside --only from earlier runs; only this run's decide the status.
+    sys.exit(1 if any(manifest['stages'][name]['status'] in ('failed', 'blocked') for name in selected) else 0)
@@ -1,52 +1,132 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
 import pandas as pd
 
-try:
-    patients = pd.read_csv('../data/synthea/patients.csv')
-    encounters = pd.read_csv('../data/synthea/encounters.csv')
+import cube
+import feature_store
+import instrumentation
+
+PATIENTS_PATH = '../data/synthea/patients.csv'
+ENCOUNTERS_PATH = '../data/synthea/encounters.csv'
+OUTPUT_PATH = '../data/preprocessed_data.parquet'
+CUBE_PATH = '../data/demographic_cube.parquet'
+
+PATIENT_COLUMNS = ['Id', 'BIRTHDATE', 'GENDER', 'RACE', 'ETHNICITY', 'COUNTY', 'ZIP']
+ENCOUNTER_COLUMNS = ['PATIENT', 'ENCOUNTERCLASS']
+OUTPUT_COLUMNS = ['Id', 'BIRTHDATE', 'GENDER', 'RACE', 'ETHNICITY', 'ENCOUNTERCLASS', 'TREATMENT']
+
+# Raw value -> code; anything missing or unmapped falls back to the default code.
+GENDER_CODES = {'M': 0, 'F': 1, 'Unknown': 2}
+RACE_CODES = {'white': 0, 'Unknown': -1}
+ETHNICITY_CODES = {'non-hispanic': 0, 'hispanic': 1, 'Unknown': -1}
+DEFAULT_CODES = {'GENDER': 2, 'RACE': -1, 'ETHNICITY': -1}
+TREATMENT_CLASSES = ['inpatient', 'emergency']
+
+
+def encode(values, mapping, default):
+    """Vectorized categorical encoding of raw strings to small-integer codes."""
+    codes = pd.Categorical(values, categories=list(mapping)).codes
+    # Categorical codes are -1 for NaN/unmapped values, which indexes the trailing default.
+    lookup = np.append(np.array(list(mapping.values()), dtype='int8'), np.int8(default))
+    return lookup[codes]
+
+
+def load_patients(path=PATIENTS_PATH):
+    """Load the needed patient columns, encoded once, as a hash index keyed by Id."""
+    patients = pd.read_csv(path, usecols=PATIENT_COLUMNS, dtype={'GENDER': 'category', 'RACE': 'category',
+                                                                  'ETHNICITY': 'category', 'ZIP': str})
+    patients['COUNTY'], patients['BIRTH_DECADE'] = cube.patient_dimensions(patients)
+    patients = patients.drop(columns=['ZIP'])
+    patients['GENDER'] = encode(patients['GENDER'], GENDER_CODES, DEFAULT_CODES['GENDER'])
+    patients['RACE'] = encode(patients['RACE'], RACE_CODES, DEFAULT_CODES['RACE'])
+    patients['ETHNICITY'] = encode(patients['ETHNICITY'], ETHNICITY_CODES, DEFAULT_CODES['ETHNICITY'])
+    return patients.set_index('Id')
+
+
+def transform_chunk(encounters, patients):
+    """Join an encounters chunk against the patient index and derive TREATMENT.
+
+    The result also carries the cube-only COUNTY and BIRTH_DECADE columns.
+    """
+    encounters = encounters.dropna(subset=['ENCOUNTERCLASS'])
+    with instrumentation.timer('preprocess_join', rows=len(encounters)):
+        data = encounters.join(patients, on='PATIENT', how='inner')
+    data = data.rename(columns={'PATIENT': 'Id'})
+    data['TREATMENT'] = data['ENCOUNTERCLASS'].isin(TREATMENT_CLASSES).astype('int8')
+    return data
+
+
+def preprocess(patients_path=PATIENTS_PATH, encounters_path=ENCOUNTERS_PATH, output_path=OUTPUT_PATH,
+               chunksize=500000, csv_path=None, cube_path=CUBE_PATH):
+    """Stream encounters in chunks, so peak memory is bounded by chunksize rather than file size.
+
+    Writes the Parquet feature store, one row group per chunk, optionally a CSV export, and the
+    demographic cube aggregated as the chunks go by. Outputs are written next to their final path
+    and moved into place only once every chunk is processed, so a failed run keeps the last good ones.
+    """
+    start = time.perf_counter()
+    patients = load_patients(patients_path)
     print(f"Loaded patients.csv with {len(patients)} records")
-    print(f"Patients columns: {list(patients.columns)}")
-    print(f"Loaded encounters.csv with {len(encounters)} records")
-    print(f"Encounters columns: {list(encounters.columns)}")
-
-    data = pd.merge(patients, encounters, left_on='Id', right_on='PATIENT', how='inner')
-    print(f"Merged data has {len(data)} records")
-    print(f"Merged columns: {list(data.columns)}")
-
-    if 'Id_x' in data.columns:
-        data = data.rename(columns={'Id_x': 'Id'})
-    if 'Id_y' in data.columns:
-        data = data.drop(columns=['Id_y'])
-    if 'PATIENT' in data.columns:
-        data = data.drop(columns=['PATIENT'])
-    if 'Id' not in data.columns:
-        raise ValueError("Id column missing after merge")
-
-    columns = ['Id', 'BIRTHDATE', 'GENDER', 'RACE', 'ETHNICITY', 'ENCOUNTERCLASS']
-    missing_cols = [col for col in columns if col not in data.columns]
-    if missing_cols:
-        raise ValueError(f"Missing columns: {missing_cols}")
-    data = data[columns]
-    print(f"After selecting columns, data has {len(data)} records")
-
-    print(f"Missing values per column:\n{data.isnull().sum()}")
-
-    data['GENDER'] = data['GENDER'].fillna('Unknown')
-    data['RACE'] = data['RACE'].fillna('Unknown')
-    data['ETHNICITY'] = data['ETHNICITY'].fillna('Unknown')
-    data = data.dropna(subset=['ENCOUNTERCLASS'])
-    print(f"After handling missing values, data has {len(data)} records")
-
-    data['GENDER'] = data['GENDER'].map({'M': 0, 'F': 1, 'Unknown': 2})
-    race_mapping = {'white': 0, 'Unknown': -1}
-    ethnicity_mapping = {'non-hispanic': 0, 'hispanic': 1, 'Unknown': -1}
-    data['RACE'] = data['RACE'].map(race_mapping).fillna(-1)
-    data['ETHNICITY'] = data['ETHNICITY'].map(ethnicity_mapping).fillna(-1)
-    data['TREATMENT'] = data['ENCOUNTERCLASS'].apply(lambda x: 1 if x in ['inpatient', 'emergency'] else 0)
-
-    data.to_csv('../data/preprocessed_data.csv', index=False)
-    print("Data preprocessing complete. Saved to ../data/preprocessed_data.csv")
-    print(f"Final dataset has {len(data)} records")
-    print(f"TREATMENT distribution:\n{data['TREATMENT'].value_counts()}")
-
-except Exception as e:
-    print(f"Error in preprocessing: {str(e)}")
\ No newline at end of file
+
+    csv_tmp_path = csv_path + '.tmp' if csv_path else None
+    rows_in = rows_out = 0
+    demographic_cube = None
+    treatment_counts = pd.Series(0, index=[0, 1], dtype='int64')
+    chunks = pd.read_csv(encounters_path, usecols=ENCOUNTER_COLUMNS, dtype={'ENCOUNTERCLASS': 'category'},
+                         chunksize=chunksize)
+    try:
+        with feature_store.open_writer(output_path) as writer:
+            for i, chunk in enumerate(chunks):
+                data = transform_chunk(chunk, patients)
+                demographic_cube = cube.merge([demographic_cube, cube.aggregate(data)])
+                data = data[OUTPUT_COLUMNS]
+                feature_store.write_chunk(writer, data)
+                if csv_path:
+                    data.to_csv(csv_tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+                rows_in += len(chunk)
+                rows_out += len(data)
+                treatment_counts = treatment_counts.add(data['TREATMENT'].value_counts(), fill_value=0)
+                elapsed = time.perf_counter() - start
+                print(f"Chunk {i + 1}: {rows_in} encounters processed ({rows_in / elapsed:,.0f} rows/s)")
+    except BaseException:
+        if csv_path and os.path.exists(csv_tmp_path):
+            os.remove(csv_tmp_path)
+        raise
+    if csv_path:
+        if rows_in == 0:
+            pd.DataFrame(columns=OUTPUT_COLUMNS).to_csv(csv_tmp_path, index=False)
+        os.replace(csv_tmp_path, csv_path)
+    if demographic_cube is not None:
+        cube.write(demographic_cube, cube_path)
+
+    elapsed = time.perf_counter() - start
+    print(f"Data preprocessing complete. Saved to {output_path}")
+    if csv_path:
+        print(f"CSV export saved to {csv_path}")
+    if demographic_cube is not None:
+        print(f"Demographic cube ({len(demographic_cube)} cells) saved to {cube_path}")
+    print(f"Final dataset has {rows_out} records")
+    print(f"Processed {rows_in} encounters in {elapsed:.2f}s ({rows_in / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"TREATMENT distribution:\n{treatment_counts.astype('int64')}")
+    return rows_out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Join Synthea patients and encounters into the feature store")
+    parser.add_argument('--patients', default=PATIENTS_PATH)
+    parser.add_argument('--encounters', default=ENCOUNTERS_PATH)
+    parser.add_argument('--output', default=OUTPUT_PATH, help="Parquet feature store path")
+    parser.add_argument('--csv', nargs='?', const='../data/preprocessed_data.csv', default=None,
+                        help="Also export the preprocessed data as CSV")
+    parser.add_argument('--cube', default=CUBE_PATH, help="Aggregate cube path")
+    parser.add_argument('--chunksize', type=int, default=500000, help="Encounter rows read per chunk")
+    args = parser.parse_args()
+    try:
+        preprocess(args.patients, args.encounters, args.output, args.chunksize, args.csv, args.cube)
+    except Exception as e:
+        print(f"Error in preprocessing: {str(e)}")
+        sys.exit(1)
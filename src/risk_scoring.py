@@ -1,17 +1,15 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
 import joblib
 
-data = pd.read_csv('../data/preprocessed_data.csv')
+import risk_table
+import training
 
-X = data[['GENDER', 'RACE', 'ETHNICITY']]
-y = data['TREATMENT']
+cells = training.load_cells()
+train_cells, test_cells = training.split_counts(cells, test_size=0.2, random_state=42)
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-risk_model = RandomForestClassifier(n_estimators=100, random_state=42)
-risk_model.fit(X_train, y_train)
+# The forest builds its trees on every core.
+risk_model = training.fit('risk', train_cells)
 
 joblib.dump(risk_model, '../models/risk_model.pkl')
-print("Risk model saved to ../models/risk_model.pkl")
\ No newline at end of file
+print("Risk model saved to ../models/risk_model.pkl")
+risk_table.build('../models/risk_model.pkl', '../models/risk_table.npz')
+print("Risk lookup table saved to ../models/risk_table.npz")
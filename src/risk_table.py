@@ -0,0 +1,89 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "risk_model.pkl")
+TABLE_PATH = os.path.join(PROJECT_ROOT, "models", "risk_table.npz")
+
+FEATURES = ['GENDER', 'RACE', 'ETHNICITY']
+# Inclusive code range of each encoded demographic, as produced by preprocess_data.py
+# and offered on the dashboard's Predict Risk form.
+CODE_RANGES = {'GENDER': (0, 2), 'RACE': (-1, 4), 'ETHNICITY': (-1, 1)}
+
+
+class StaleTableError(ValueError):
+    pass
+
+
+def model_version(model_path=MODEL_PATH):
+    """Content hash of the pickled model the table was compiled from."""
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def all_cells():
+    """Every encoded demographic combination, in table (C) order."""
+    axes = [np.arange(lo, hi + 1) for lo, hi in (CODE_RANGES[f] for f in FEATURES)]
+    grid = np.meshgrid(*axes, indexing='ij')
+    return pd.DataFrame({f: g.ravel() for f, g in zip(FEATURES, grid)})
+
+
+class RiskTable:
+    """Dense P(TREATMENT=1) table indexed by encoded demographics."""
+
+    def __init__(self, probs, version):
+        self.probs = probs
+        self.version = version
+        self.offsets = np.array([CODE_RANGES[f][0] for f in FEATURES])
+
+    def score(self, X):
+        """Score a batch of rows with a single gather; X needs GENDER, RACE and ETHNICITY."""
+        idx = tuple(np.asarray(X[f], dtype=np.int64) - off for f, off in zip(FEATURES, self.offsets))
+        for f, i, n in zip(FEATURES, idx, self.probs.shape):
+            if len(i) and (i.min() < 0 or i.max() >= n):
+                raise ValueError(f"{f} code outside the compiled range {CODE_RANGES[f]}")
+        return self.probs[idx]
+
+
+def compile_table(model, version):
+    cells = all_cells()
+    shape = tuple(hi - lo + 1 for lo, hi in (CODE_RANGES[f] for f in FEATURES))
+    with instrumentation.timer('predict_proba', rows=len(cells), caller='risk_table'):
+        probs = model.predict_proba(cells[FEATURES])[:, 1].reshape(shape)
+    return RiskTable(probs, version)
+
+
+def save_table(table, table_path=TABLE_PATH):
+    np.savez(table_path, probs=table.probs, version=np.array(table.version))
+
+
+def load_table(table_path=TABLE_PATH, model_path=MODEL_PATH):
+    """Load the compiled table, refusing one that no longer matches the pickled model."""
+    with np.load(table_path) as f:
+        probs, version = f['probs'], str(f['version'])
+    if version != model_version(model_path):
+        raise StaleTableError(f"{table_path} was compiled from a different {os.path.basename(model_path)}; "
+                              "please rerun risk_scoring.py or risk_table.py")
+    return RiskTable(probs, version)
+
+
+def build(model_path=MODEL_PATH, table_path=TABLE_PATH):
+    import joblib  # Unpickling the model also imports scikit-learn; only building the table needs either.
+
+    table = compile_table(joblib.load(model_path), model_version(model_path))
+    save_table(table, table_path)
+    return table
+
+
+if __name__ == '__main__':
+    build()
+    print(f"Risk table saved to {TABLE_PATH}")
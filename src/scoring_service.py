@@ -0,0 +1,400 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import instrumentation
+import risk_table
+from preprocess_data import DEFAULT_CODES, ETHNICITY_CODES, GENDER_CODES, RACE_CODES, encode
+from risk_table import CODE_RANGES, FEATURES, MODEL_PATH, TABLE_PATH
+
+HOST, PORT = '127.0.0.1', 8766
+MAX_BATCH_ROWS = 4096
+MAX_WAIT_MS = 5
+# Pending requests beyond this are turned away with 503 rather than queued without bound.
+MAX_QUEUE = 1024
+CHUNKSIZE = 100000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+ENCODINGS = {'GENDER': GENDER_CODES, 'RACE': RACE_CODES, 'ETHNICITY': ETHNICITY_CODES}
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class Scorer:
+    """Vectorized P(TREATMENT=1): the compiled risk table if it is current, else the pickled model."""
+
+    def __init__(self, model_path=MODEL_PATH, table_path=TABLE_PATH):
+        try:
+            self.table = risk_table.load_table(table_path, model_path)
+            self.model = None
+            self.source = 'risk_table'
+            self.version = self.table.version
+        except (OSError, risk_table.StaleTableError) as e:
+            print(f"Risk table unavailable ({e}); scoring with {os.path.basename(model_path)}")
+            self.table = None
+            self.model = joblib.load(model_path)
+            self.source = 'model'
+            self.version = risk_table.model_version(model_path)
+
+    def check(self, X):
+        """Raise ValueError for rows the table cannot score, before they join a batch."""
+        if self.table is None:
+            return
+        for f in FEATURES:
+            lo, hi = CODE_RANGES[f]
+            if len(X[f]) and (X[f].min() < lo or X[f].max() > hi):
+                raise ValueError(f"{f} code outside the compiled range {CODE_RANGES[f]}")
+
+    def score(self, X):
+        if self.table is not None:
+            with instrumentation.timer('risk_table_score', rows=n_rows(X), caller='scoring_service'):
+                return self.table.score(X)
+        with instrumentation.timer('predict_proba', rows=n_rows(X), caller='scoring_service'):
+            return self.model.predict_proba(pd.DataFrame(X, columns=FEATURES))[:, 1]
+
+
+def encode_features(columns):
+    """{feature: int64 array} from a frame or dict of columns; raw Synthea strings ('F', 'white')
+    are encoded like preprocess_data. Nulls, non-integral codes and columns mixing codes with
+    strings raise ValueError rather than being truncated or scored as 'Unknown'."""
+    missing = [f for f in FEATURES if f not in columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+    X = {}
+    for f in FEATURES:
+        values = columns[f] if isinstance(columns[f], pd.Series) else pd.Series(columns[f])
+        if values.isna().any():
+            raise ValueError(f"{f} has missing values")
+        kind = pd.api.types.infer_dtype(values, skipna=False)
+        if kind == 'string':
+            X[f] = encode(values.to_numpy(), ENCODINGS[f], DEFAULT_CODES[f]).astype(np.int64)
+        elif kind == 'integer' and values.dtype.kind in 'iu':
+            X[f] = values.to_numpy(dtype=np.int64)
+        elif kind in ('integer', 'floating', 'mixed-integer-float', 'empty'):
+            codes = values.to_numpy(dtype=np.float64)
+            if not np.isfinite(codes).all() or (codes != np.trunc(codes)).any():
+                raise ValueError(f"{f} codes must be whole numbers")
+            if (np.abs(codes) >= 2 ** 63).any():
+                raise ValueError(f"{f} code too large")
+            X[f] = codes.astype(np.int64)
+        else:
+            raise ValueError(f"{f} must be all integer codes or all strings, not {kind} values")
+    return X
+
+
+def n_rows(X):
+    return len(X[FEATURES[0]])
+
+
+class LatencyStats:
+    """Rolling latency percentiles and overall throughput."""
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.rows = 0
+        self.count = 0
+        self.started = time.perf_counter()
+
+    def record(self, seconds, rows):
+        self.latencies.append(seconds)
+        self.rows += rows
+        self.count += 1
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = np.fromiter(self.latencies, dtype=float) * 1000
+        # None (JSON null) until there is a sample; NaN is not valid JSON.
+        p50, p99 = (float(p) for p in np.percentile(latencies, [50, 99])) if len(latencies) else (None, None)
+        return {'count': self.count, 'rows': self.rows, 'rows_per_s': self.rows / elapsed if elapsed else 0.0,
+                'p50_ms': p50, 'p99_ms': p99}
+
+
+class Overloaded(Exception):
+    pass
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests into one vectorized score call per batch."""
+
+    def __init__(self, scorer, max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS, max_queue=MAX_QUEUE):
+        self.scorer = scorer
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.request_stats = LatencyStats()
+        self.batch_sizes = deque(maxlen=10000)
+        self.rejected = 0
+
+    async def submit(self, X):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((X, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise Overloaded from None
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            rows = n_rows(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch_rows:
+                if self.queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self.queue.get_nowait()
+                batch.append(item)
+                rows += n_rows(item[0])
+            X = {f: np.concatenate([x[f] for x, _ in batch]) for f in FEATURES}
+            try:
+                if self.scorer.table is not None:
+                    scores = self.scorer.score(X)
+                else:
+                    # Model inference holds the GIL for a while; keep the event loop responsive.
+                    scores = await loop.run_in_executor(None, self.scorer.score, X)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batch_sizes.append(rows)
+            offset = 0
+            for x, future in batch:
+                if not future.done():
+                    future.set_result(scores[offset:offset + n_rows(x)])
+                offset += n_rows(x)
+
+    def metrics(self):
+        sizes = np.fromiter(self.batch_sizes, dtype=float)
+        return dict(self.request_stats.snapshot(), queue_depth=self.queue.qsize(), rejected=self.rejected,
+                    batches=len(sizes), mean_batch_rows=float(sizes.mean()) if len(sizes) else 0.0,
+                    source=self.scorer.source, model_version=self.scorer.version)
+
+
+def parse_patients(body):
+    """{"patients": [{"GENDER": 1, "RACE": 0, "ETHNICITY": 0}, ...]} -> encoded feature arrays."""
+    payload = json.loads(body)
+    records = payload['patients'] if isinstance(payload, dict) else payload
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list) or not records:
+        raise ValueError("Expected a non-empty list of patients")
+    return encode_features({f: [r[f] for r in records] for f in FEATURES if all(f in r for r in records)})
+
+
+async def read_request(reader):
+    """Minimal HTTP/1.1 request parsing: (method, path, headers, body), or None at end of stream."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise OverflowError(length)
+    body = await reader.readexactly(length) if length else b''
+    return method, path.split('?', 1)[0], headers, body
+
+
+def write_response(writer, status, body, keep_alive=True, extra_headers=()):
+    payload = json.dumps(body).encode('utf-8')
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", 'Content-Type: application/json',
+             f"Content-Length: {len(payload)}", f"Connection: {'keep-alive' if keep_alive else 'close'}",
+             *extra_headers]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+
+
+def make_handler(batcher):
+    async def handle(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except OverflowError:
+                    write_response(writer, 413, {'error': f"Body larger than {MAX_BODY_BYTES} bytes"}, False)
+                    break
+                except ValueError:
+                    write_response(writer, 400, {'error': 'Malformed HTTP request'}, False)
+                    break
+                except asyncio.IncompleteReadError:
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    status, response, extra = await dispatch(batcher, method, path, body)
+                except Exception as e:
+                    status, response, extra = 500, {'error': f"Scoring failed: {e!r}"}, ()
+                write_response(writer, status, response, keep_alive, extra)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def dispatch(batcher, method, path, body):
+    if path == '/health':
+        return 200, {'status': 'ok', 'source': batcher.scorer.source}, ()
+    if path == '/metrics':
+        return 200, batcher.metrics(), ()
+    if path != '/score':
+        return 404, {'error': 'Not found'}, ()
+    if method != 'POST':
+        return 405, {'error': 'Use POST'}, ()
+    started = time.perf_counter()
+    try:
+        X = parse_patients(body)
+        batcher.scorer.check(X)
+    except (ValueError, KeyError, TypeError) as e:
+        return 400, {'error': str(e)}, ()
+    try:
+        scores = await batcher.submit(X)
+    except Overloaded:
+        return 503, {'error': 'Scoring queue is full; retry shortly'}, ('Retry-After: 1',)
+    batcher.request_stats.record(time.perf_counter() - started, n_rows(X))
+    return 200, {'risk_scores': scores.tolist(), 'model_version': batcher.scorer.version}, ()
+
+
+async def serve_async(host=HOST, port=PORT, **batch_kwargs):
+    batcher = MicroBatcher(Scorer(), **batch_kwargs)
+    worker = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(make_handler(batcher), host, port, backlog=1024)
+    print(f"Scoring service ({batcher.scorer.source}) listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        worker.cancel()
+
+
+_worker_scorer = None
+
+
+def _init_worker(model_path, table_path):
+    global _worker_scorer
+    _worker_scorer = Scorer(model_path, table_path)
+
+
+def _score_chunk(chunk):
+    started = time.perf_counter()
+    X = encode_features(chunk)
+    chunk = chunk.assign(risk_score=_worker_scorer.score(X))
+    return chunk, time.perf_counter() - started
+
+
+def iter_chunks(path, chunksize=CHUNKSIZE):
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or (by extension) Parquet output."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self.writer = None
+
+    def write(self, chunk):
+        if self.parquet:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema, compression='zstd')
+            self.writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='a' if self.writer else 'w', header=self.writer is None, index=False)
+            self.writer = True
+
+    def close(self):
+        if self.parquet and self.writer is not None:
+            self.writer.close()
+
+
+def score_file(input_path, output_path, chunksize=CHUNKSIZE, workers=None, model_path=MODEL_PATH,
+               table_path=TABLE_PATH):
+    """Stream a patient file through the scorer in chunks across a process pool, keeping input order."""
+    workers = workers or os.cpu_count()
+    stats = LatencyStats()
+    out = ChunkWriter(output_path)
+    pending = deque()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path, table_path)) as pool:
+        # At most two chunks per worker in flight, so memory stays bounded on large inputs.
+        for chunk in iter_chunks(input_path, chunksize):
+            pending.append(pool.submit(_score_chunk, chunk))
+            while len(pending) >= 2 * workers:
+                scored, seconds = pending.popleft().result()
+                out.write(scored)
+                stats.record(seconds, len(scored))
+        while pending:
+            scored, seconds = pending.popleft().result()
+            out.write(scored)
+            stats.record(seconds, len(scored))
+    out.close()
+    return stats.snapshot()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Online and bulk risk scoring")
+    sub = parser.add_subparsers(dest='mode')
+    online = sub.add_parser('serve', help="Micro-batching HTTP endpoint (the default)")
+    online.add_argument('--host', default=HOST)
+    online.add_argument('--port', type=int, default=PORT)
+    online.add_argument('--max-batch-rows', type=int, default=MAX_BATCH_ROWS)
+    online.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    online.add_argument('--max-queue', type=int, default=MAX_QUEUE)
+    bulk = sub.add_parser('bulk', help="Score a CSV or Parquet file of patients")
+    bulk.add_argument('input')
+    bulk.add_argument('output')
+    bulk.add_argument('--chunksize', type=int, default=CHUNKSIZE)
+    bulk.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    if args.mode == 'bulk':
+        report = score_file(args.input, args.output, args.chunksize, args.workers)
+        latency = (f" (chunk latency p50 {report['p50_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms)"
+                   if report['count'] else "")
+        print(f"Scored {report['rows']} rows in {report['count']} chunks at {report['rows_per_s']:,.0f} rows/s"
+              f"{latency}; saved to {args.output}")
+    else:
+        host, port = getattr(args, 'host', HOST), getattr(args, 'port', PORT)
+        kwargs = {}
+        if args.mode == 'serve':
+            kwargs = {'max_batch_rows': args.max_batch_rows, 'max_wait_ms': args.max_wait_ms,
+                      'max_queue': args.max_queue}
+        try:
+            asyncio.run(serve_async(host, port, **kwargs))
+        except KeyboardInterrupt:
+            pass
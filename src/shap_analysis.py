@@ -1,30 +1,50 @@
-import pandas as pd
 import joblib
-import shap
-from sklearn.model_selection import train_test_split
-import matplotlib.pyplot as plt
-from shap import links  # Import for logit link function
+import numpy as np
+import pandas as pd
 
-# Load data and model
-data = pd.read_csv('../data/preprocessed_data.csv')
+import instrumentation
+import training
+from explanations import background_weights, broadcast, cell_index, cell_table, group_table
+
+# Load data and models
+data_cells = training.load_cells()
 model = joblib.load('../models/model.pkl')
+risk_model = joblib.load('../models/risk_model.pkl')
 
-# Prepare data
-X = data[['GENDER', 'RACE', 'ETHNICITY']]
-y = data['TREATMENT']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+# Same held-out count split as training
+train_cells, test_cells = training.split_counts(data_cells, test_size=0.2, random_state=42)
 
-# Summarize background data for efficiency
-background = shap.sample(X_train, 100).values
+def risk_proba(X):
+    with instrumentation.timer('predict_proba', rows=len(X), caller='shap_analysis'):
+        return risk_model.predict_proba(X)[:, 1]
 
-# Create explainer with logit link
-explainer = shap.LinearExplainer(model, background, link=shap.links.logit)
+# Exact Shapley values per demographic cell, against the full training distribution.
+# The logistic model is explained in log-odds (as LinearExplainer with a logit link does),
+# the random forest in probability space.
+background = background_weights(train_cells, train_cells['count'])
+test_counts = np.bincount(cell_index(test_cells), weights=test_cells['count'],
+                          minlength=len(background)).astype(np.int64)
+cells = pd.concat([
+    cell_table('model', model.decision_function, background, test_counts),
+    cell_table('risk_model', risk_proba, background, test_counts),
+], ignore_index=True)
+cells.to_csv('../results/shap_cells.csv', index=False)
+group_table(cells).to_csv('../results/shap_groups.csv', index=False)
+print("SHAP attributions saved to ../results/shap_cells.csv and ../results/shap_groups.csv")
 
-# Compute SHAP values
-shap_values = explainer.shap_values(X_test.values)
+# Generate and save summary plot, broadcasting the cell values back to a count-weighted sample
+# of test rows; the plot draws one dot per row, so PLOT_ROWS bounds its memory and time.
+# shap and matplotlib are only needed for this plot, and are the slowest imports here.
+import shap
+import matplotlib.pyplot as plt
 
-# Generate and save summary plot
+PLOT_ROWS = 5000
+weights = test_cells['count'].to_numpy(dtype=np.float64)
+rng = np.random.default_rng(42)
+sample = rng.choice(len(test_cells), size=min(PLOT_ROWS, int(weights.sum())), p=weights / weights.sum())
+X_test = test_cells.iloc[sample][training.FEATURES].reset_index(drop=True)
+shap_values = broadcast(cells[cells['model'] == 'model'], X_test)
 shap.summary_plot(shap_values, X_test, feature_names=X_test.columns, show=False)
 plt.savefig('../results/shap_plot.png', bbox_inches='tight')
 plt.close()
-print("SHAP plot saved to ../results/shap_plot.png")
\ No newline at end of file
+print("SHAP plot saved to ../results/shap_plot.png")
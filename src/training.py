@@ -0,0 +1,172 @@
+import argparse
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+
+import instrumentation
+from feature_store import STORE_PATH, iter_features
+from risk_table import FEATURES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+RESULTS_PATH = os.path.join(PROJECT_ROOT, "results")
+
+LABEL = 'TREATMENT'
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+N_SPLITS = 5
+
+# Every model is fit on one weighted row per (demographic cell, label). `balanced` reweights the
+# classes to equal total weight, which is what SMOTE's oversampling was approximating.
+# The forest does not bootstrap: resampling the few cells would drop whole demographics from a tree.
+MODELS = {
+    'bias': {
+        'estimator': LogisticRegression(random_state=RANDOM_STATE, max_iter=1000),
+        'balanced': True,
+        'grid': {'C': [0.01, 0.1, 1.0, 10.0]},
+    },
+    'risk': {
+        'estimator': RandomForestClassifier(n_estimators=100, bootstrap=False, n_jobs=-1, random_state=RANDOM_STATE),
+        'balanced': False,
+        'grid': {'n_estimators': [50, 100, 200], 'max_depth': [None, 2, 3],
+                 'min_weight_fraction_leaf': [0.0, 0.01, 0.05]},
+    },
+}
+
+
+def aggregate(data):
+    """Count rows per (demographic cell, label): the sufficient statistics for training."""
+    keys = FEATURES + [LABEL]
+    frame = data[keys].astype({f: 'int64' for f in FEATURES}).astype({LABEL: 'int8'})
+    return frame.value_counts(sort=False).rename('count').reset_index()
+
+
+def merge_cells(cells):
+    """Combine aggregate() tables over disjoint rows, in a fixed (sorted) order."""
+    cells = pd.concat(cells, ignore_index=True)
+    return cells.groupby(FEATURES + [LABEL], as_index=False)['count'].sum()
+
+
+def load_cells(path=STORE_PATH):
+    """Aggregate the feature store batch by batch; memory is bounded by the batch size."""
+    return merge_cells([aggregate(batch) for batch in iter_features(FEATURES + [LABEL], path)])
+
+
+def split_counts(cells, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """Random train/test split of the underlying rows, done on the counts.
+
+    Sending each row to the test set with probability test_size leaves a binomial number of
+    each cell's rows there, so one draw per cell replaces shuffling every row.
+    """
+    rng = np.random.default_rng(random_state)
+    test = rng.binomial(cells['count'].to_numpy(), test_size)
+    train_cells = cells.assign(count=cells['count'] - test)
+    test_cells = cells.assign(count=test)
+    return (train_cells[train_cells['count'] > 0].reset_index(drop=True),
+            test_cells[test_cells['count'] > 0].reset_index(drop=True))
+
+
+def fold_counts(cells, n_splits=N_SPLITS, random_state=RANDOM_STATE):
+    """(cells, n_splits) rows per fold: a multinomial K-fold split of each cell's rows."""
+    rng = np.random.default_rng(random_state)
+    return rng.multinomial(cells['count'].to_numpy(), np.full(n_splits, 1 / n_splits))
+
+
+def sample_weight(cells, counts, balanced):
+    """Row counts as sample weights, optionally rescaled so both labels carry equal total weight."""
+    weights = np.asarray(counts, dtype=float)
+    if balanced:
+        y = cells[LABEL].to_numpy()
+        totals = np.bincount(y, weights=weights, minlength=2)
+        with np.errstate(divide='ignore'):
+            class_weight = np.where(totals > 0, weights.sum() / (len(totals) * totals), 0.0)
+        weights = weights * class_weight[y]
+    return weights
+
+
+def make_model(name, **params):
+    return clone(MODELS[name]['estimator']).set_params(**params)
+
+
+def fit_estimator(estimator, cells, counts=None, balanced=False):
+    counts = cells['count'].to_numpy() if counts is None else np.asarray(counts)
+    mask = counts > 0
+    weights = sample_weight(cells, counts, balanced)[mask]
+    return estimator.fit(cells.loc[mask, FEATURES], cells.loc[mask, LABEL], sample_weight=weights)
+
+
+def fit(name, cells, counts=None, **params):
+    """Fit one of MODELS on cell counts (default: cells['count']) with its class weighting."""
+    return fit_estimator(make_model(name, **params), cells, counts, MODELS[name]['balanced'])
+
+
+def evaluate(model, cells, counts=None):
+    """Count-weighted accuracy, log loss and ROC AUC, equal to the per-row metrics."""
+    counts = cells['count'].to_numpy() if counts is None else np.asarray(counts)
+    mask = counts > 0
+    X, y, w = cells.loc[mask, FEATURES], cells.loc[mask, LABEL], counts[mask]
+    with instrumentation.timer('predict_proba', rows=len(X), caller='training'):
+        proba = model.predict_proba(X)[:, 1]
+    metrics = {'accuracy': accuracy_score(y, model.predict(X), sample_weight=w),
+               'log_loss': log_loss(y, proba, sample_weight=w, labels=[0, 1])}
+    metrics['roc_auc'] = roc_auc_score(y, proba, sample_weight=w) if y.nunique() == 2 else np.nan
+    return metrics
+
+
+def _fit_fold(name, cells, train_counts, test_counts, params):
+    estimator = make_model(name, **params)
+    if 'n_jobs' in estimator.get_params():
+        # The folds already run in parallel; don't oversubscribe the cores.
+        estimator.set_params(n_jobs=1)
+    started = time.perf_counter()
+    model = fit_estimator(estimator, cells, train_counts, MODELS[name]['balanced'])
+    return dict(evaluate(model, cells, test_counts), fit_seconds=time.perf_counter() - started)
+
+
+def cross_validate(name, cells, params_list=({},), n_splits=N_SPLITS, random_state=RANDOM_STATE, n_jobs=-1):
+    """K-fold scores for each parameter set; every (parameters, fold) fit runs as its own job."""
+    folds = fold_counts(cells, n_splits, random_state)
+    total = cells['count'].to_numpy()
+    jobs = [(i, k) for i in range(len(params_list)) for k in range(n_splits)]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(name, cells, total - folds[:, k], folds[:, k], params_list[i]) for i, k in jobs)
+    results = pd.DataFrame(scores)
+    results['params'] = [i for i, _ in jobs]
+    summary = results.groupby('params').agg(['mean', 'std'])
+    summary.columns = [f"{metric}_{stat}" for metric, stat in summary.columns]
+    params = pd.DataFrame(list(params_list), index=range(len(params_list)))
+    return params.join(summary).reset_index(drop=True)
+
+
+def sweep(name, cells, grid=None, n_splits=N_SPLITS, random_state=RANDOM_STATE, n_jobs=-1):
+    """Cross-validate every combination in the grid (default: the model's own), best log loss first."""
+    grid = MODELS[name]['grid'] if grid is None else grid
+    keys = list(grid)
+    params_list = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    results = cross_validate(name, cells, params_list, n_splits, random_state, n_jobs)
+    return results.sort_values('log_loss_mean').reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter sweep on demographic cell counts")
+    parser.add_argument('--sweep', choices=sorted(MODELS), required=True, help="Model to tune")
+    parser.add_argument('--folds', type=int, default=N_SPLITS)
+    parser.add_argument('--jobs', type=int, default=-1)
+    args = parser.parse_args()
+    cells = load_cells()
+    train_cells, _ = split_counts(cells)
+    started = time.perf_counter()
+    results = sweep(args.sweep, train_cells, n_splits=args.folds, n_jobs=args.jobs)
+    output_path = os.path.join(RESULTS_PATH, f"{args.sweep}_sweep.csv")
+    results.to_csv(output_path, index=False)
+    print(results.head(10).to_string(index=False))
+    print(f"{len(results)} settings x {args.folds} folds in {time.perf_counter() - started:.1f}s; "
+          f"saved to {output_path}")